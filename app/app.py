@@ -2,6 +2,7 @@
 import os
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import logging
 import dash_bootstrap_components as dbc
 import redis
@@ -9,9 +10,26 @@ from dash import Dash, html, dcc, dash_table, dash
 from dash.dependencies import Input, Output, State
 from flask import Flask, session
 from flask_session import Session
-from app.config import pulse_ratios, energy_type_mapping, energy_meter_options
-from app.data_processing import process_uploaded_file, load_initial_csv_data, apply_pulse_ratios
+from app.compact_schema import (
+    day_labels, is_compact, key_columns, label_names, meter_columns, parse_day, readings, row_timestamps, slice_days,
+    to_labels
+)
+from app.config import pulse_ratios, energy_type_mapping, energy_meter_options, graph_point_budget
+from app.data_processing import load_initial_csv_data, apply_pulse_ratios
 from app.database import init_db
+from app.dataset_registry import (
+    frame_derived, get_current_version, get_day_index, is_expired, publish_dataset, resolve_dataset, resolve_figure,
+    resolve_rollups, make_handle
+)
+from app.downsampling import downsample_series
+from app.heatmap_cache import get_heatmap_matrices, select_heatmap
+from app.instrumentation import instrument_callbacks, register_metrics_routes
+from app.memory_profile import MEMORY_PROFILING, profile_callbacks, register_memory_routes
+from app.rollups import time_of_day_means
+from app.table_paging import DEFAULT_PAGE_SIZE, get_page
+from app.upload_jobs import describe_upload_job, get_upload_job, make_job_handle, may_still_appear, submit_upload_job
+from app.usage_store import load_dataset
+from app.warmup import get_warmup_error, is_ready, loading_message, start_warmup
 from app.layouts.dashboard_layout import get_dashboard_layout
 from app.layouts.login_layout import get_login_layout
 from app.layouts.statistics_layout import get_statistics_layout
@@ -22,6 +40,10 @@ from app.login import register_auth_callbacks, register_login_callbacks
 from app.save_data_collection import register_save_data_callbacks
 from app.statistics import register_statistics_callbacks
 from app.costs_and_carbon import register_costs_and_carbon_callbacks
+from app.exports import register_export_routes
+
+# LOG_LEVEL=DEBUG brings back the per-request debug output
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 
 # Create a Flask server instance
 server = Flask(__name__)
@@ -51,54 +73,125 @@ app = Dash(
     external_stylesheets=[dbc.themes.FLATLY],
     assets_folder=os.path.join(os.path.dirname(__file__), '../assets')  # Explicitly point to the assets folder
 )
-# Load initial data
-initial_df = load_initial_csv_data()
-initial_df = apply_pulse_ratios(initial_df, pulse_ratios)
-
-app.layout = html.Div([
-    dcc.Location(id='url', refresh=False),
-    html.Div(id='page-content'),
-    dcc.Store(id='data-store', data=initial_df.to_dict('records'))
-])
+# Every callback registered from here on is timed and sized; see /metrics
+instrument_callbacks(app)
+# MEMORY_PROFILING=true also traces their allocations; see /admin/memory
+if MEMORY_PROFILING:
+    profile_callbacks(app)
+
+def load_initial_dataset():
+    changed = []
+    initial_df = load_initial_csv_data(changed=changed)
+    initial_df = apply_pulse_ratios(initial_df, pulse_ratios)
+    # The dataset is served from the workbook cache; UploadedData only persists readings, so just the
+    # new or changed workbooks are written to it and only the days the workbooks don't have are read back
+    changed_dates = {day for df in changed if 'Date' in df.columns for day in df['Date']}
+    with server.app_context():
+        initial_df = load_dataset(initial_df, changed_dates)
+    # The frame stays on the server; the browser only holds a small handle to it
+    publish_dataset(initial_df)
+
+# The server can answer requests while the data loads; see app/warmup.py for the startup modes
+start_warmup(load_initial_dataset)
+
+def serve_layout():
+    # Built on each page load, so the handle points at the current dataset once the warm-up is done
+    return html.Div([
+        dcc.Location(id='url', refresh=False),
+        html.Div(id='page-content'),
+        dcc.Store(id='data-store', data=make_handle(get_current_version())),
+        html.Div(id='warmup-status', className='text-muted text-center',
+                 children=None if is_ready() else loading_message()),
+        dcc.Interval(id='warmup-interval', interval=1000, disabled=is_ready())
+    ])
+
+app.layout = serve_layout
 
 app.validation_layout = html.Div([  # Ensure that 'url' is part of the validation layout
     dcc.Location(id='url', refresh=False),
     html.Div(id='page-content'),
-    dcc.Store(id='data-store', data=initial_df.to_dict('records')),
+    dcc.Store(id='data-store'),
+    html.Div(id='warmup-status'),
+    dcc.Interval(id='warmup-interval'),
+    dash_table.DataTable(id='dashboard-table'),  # Rendered on demand by update_combined
+    dcc.Graph(id='dashboard-graph'),
     get_login_layout(),
-    get_dashboard_layout(initial_df),
-    get_statistics_layout(initial_df),
-    get_save_data_collection_layout(initial_df, app),
-    get_costs_and_carbon_layout(initial_df)
+    get_dashboard_layout(None),
+    get_statistics_layout(None),
+    get_save_data_collection_layout(None, app),
+    get_costs_and_carbon_layout(None)
 ])
 
 @app.callback(
-    [Output('data-store', 'data'),
-     Output('upload-message', 'children')],
+    [Output('data-store', 'data', allow_duplicate=True),
+     Output('warmup-status', 'children'),
+     Output('warmup-interval', 'disabled')],
+    [Input('warmup-interval', 'n_intervals')],
+    prevent_initial_call=True
+)
+def poll_warmup(n_intervals):
+    if not is_ready():
+        return dash.no_update, loading_message(), False
+    if get_warmup_error():
+        return dash.no_update, loading_message(), True
+    # Swapping in the handle re-runs every callback that reads the data-store
+    return make_handle(get_current_version()), None, True
+
+@app.callback(
+    Output('warmup-status', 'children', allow_duplicate=True),
+    [Input('url', 'pathname'),
+     Input('data-store', 'data')],
+    prevent_initial_call='initial_duplicate'
+)
+def show_expired_dataset(pathname, data):
+    # The callbacks show nothing for a handle this worker can't serve; say why instead of substituting other data
+    if is_expired(data):
+        return "This dataset is no longer available on the server. Reload the page to see the current data."
+    return dash.no_update
+
+@app.callback(
+    [Output('upload-job-store', 'data'),
+     Output('upload-message', 'children'),
+     Output('upload-progress-interval', 'disabled')],
     [Input('add-file', 'contents')],
     [State('add-file', 'filename'),
      State('data-store', 'data')]
 )
 def upload_files_or_zips(contents_list, filenames, data):
+    if not session.get('logged_in'):
+        return dash.no_update, dash.no_update, dash.no_update
     if contents_list is not None:
-        for contents, filename in zip(contents_list, filenames):
-            data = process_uploaded_file(contents, filename, data)
+        if not is_ready():
+            return dash.no_update, "Data is still loading, please upload again once it is ready.", dash.no_update
+        # Parsing runs in the background so large ZIPs don't hold the worker; progress is polled below
+        job_id = submit_upload_job(contents_list, filenames, data, app_context=server.app_context)
+        return make_job_handle(job_id), "Upload queued...", False
 
-        updated_df = load_initial_csv_data()
-        updated_df = apply_pulse_ratios(updated_df, pulse_ratios)
+    return dash.no_update, "", dash.no_update
 
-        # Map pulse ratios to user-friendly labels
-        pulse_ratios_applied = "\n".join(
-            [f"- {energy_type_mapping.get(key, key)}: {value}" for key, value in pulse_ratios.items()]
-        )
-        file_count_message = (
-            f"{len(filenames)} files uploaded and processed successfully.\n"
-            f"Pulse ratios applied:\n{pulse_ratios_applied}"
-        )
-
-        return updated_df.to_dict('records'), file_count_message
-
-    return dash.no_update, ""
+@app.callback(
+    [Output('data-store', 'data'),
+     Output('upload-message', 'children', allow_duplicate=True),
+     Output('upload-progress-interval', 'disabled', allow_duplicate=True)],
+    [Input('upload-progress-interval', 'n_intervals')],
+    [State('upload-job-store', 'data')],
+    prevent_initial_call=True
+)
+def poll_upload_job(n_intervals, job_data):
+    if not session.get('logged_in'):
+        return dash.no_update, dash.no_update, True
+    job = get_upload_job((job_data or {}).get('job_id'))
+    if job is None:
+        # The poll may have reached a worker that can't see the job (no REDIS_URL); keep asking until it expires
+        waiting = may_still_appear(job_data)
+        return dash.no_update, describe_upload_job(None, waiting), not waiting
+    message = describe_upload_job(job)
+    if job['status'] == 'failed':
+        return dash.no_update, message, True
+    if job['status'] == 'done':
+        # Publishing the new version to the dashboard is just swapping the handle
+        return make_handle(job['version']), message, True
+    return dash.no_update, message, False
 
 @app.callback(Output('page-content', 'children'),
               [Input('url', 'pathname')])
@@ -108,26 +201,114 @@ def display_page(pathname):
         return get_login_layout()  # Redirect to login layout if not logged in
     # Handle page routing
     if pathname == '/dashboard':
-        return get_dashboard_layout(initial_df)
+        return get_dashboard_layout(None)
     elif pathname == '/save-data-collection':
-        return get_save_data_collection_layout(initial_df, app)
+        return get_save_data_collection_layout(None, app)
     elif pathname == '/login':
         return get_login_layout()
     elif pathname == '/statistics':
-        return get_statistics_layout(initial_df)
+        return get_statistics_layout(None)
     elif pathname == '/costs-and-carbon':
-        return get_costs_and_carbon_layout(initial_df)
+        return get_costs_and_carbon_layout(None)
     else:
         return get_login_layout()  # Default to login if no matching path
 
 def register_callbacks():
-    register_login_callbacks(app, get_dashboard_layout, initial_df)
+    register_login_callbacks(app, get_dashboard_layout, None)
     register_statistics_callbacks(app)
     register_save_data_callbacks(app)
     register_costs_and_carbon_callbacks(app)
+    register_export_routes(server)
+    register_metrics_routes(server)
+    register_memory_routes(server, app)
 
 register_callbacks()
 
+def filter_by_date(data, df_combined, selected_date):
+    # Returns None when there is nothing to average
+    if selected_date == 'all':
+        return df_combined
+    elif selected_date == 'average':
+        # Per-time-of-day means come from the precomputed rollups
+        rollups = resolve_rollups(data)
+        meters = meter_columns(df_combined)
+        if not meters or rollups is None:
+            return None
+        df_filtered = time_of_day_means(rollups)[meters].reset_index()
+        df_filtered['Date'] = 'Average'
+        columns_order = ['Date'] + [col for col in df_filtered.columns if col != 'Date']
+        return df_filtered[columns_order]
+    else:
+        day = parse_day(selected_date)
+        return slice_days(df_combined, get_day_index(df_combined), day, day)
+
+def get_timestamps(df):
+    # Day and slot numbers combined into real timestamps, built once per dataset version
+    return frame_derived(df, 'timestamps', lambda df: pd.Series(row_timestamps(df), index=df.index))
+
+def build_line_figure(df_filtered, selected_energy_type, selected_date, x_range=None):
+    value_vars = (
+        [selected_energy_type]
+        if selected_energy_type != 'all'
+        else meter_columns(df_filtered)
+    )
+
+    if selected_date == 'all':
+        # Long date spans are plotted against timestamps and downsampled per trace with LTTB;
+        # zooming in (x_range) re-queries the visible span at full resolution up to the point budget
+        # df_filtered is the whole sorted dataset from resolve_dataset here, so the timestamps are sorted
+        # and line up with it by position
+        timestamps = get_timestamps(df_filtered)
+        start, stop = 0, len(timestamps)
+        if x_range:
+            start = timestamps.searchsorted(pd.Timestamp(x_range[0]), side='left')
+            stop = max(start, timestamps.searchsorted(pd.Timestamp(x_range[1]), side='right'))
+        visible = timestamps.iloc[start:stop].values
+        traces = []
+        for col in value_vars:
+            x, y = downsample_series(visible, readings(df_filtered[col].iloc[start:stop]), graph_point_budget)
+            traces.append(pd.DataFrame({'Time': x, 'Energy Type': col, 'Usage': y}))
+        df_melted = pd.concat(traces, ignore_index=True)
+        time_label = 'Date and Time'
+    else:
+        # A day or the average is a few dozen rows, labelled for the axis here
+        df_melted = to_labels(df_filtered).melt(
+            id_vars=['Time', 'Date'],
+            value_vars=value_vars,
+            var_name='Energy Type',
+            value_name='Usage'
+        )
+        time_label = 'Time of Day'
+
+    # Build basic figure
+    fig = px.line(
+        df_melted,
+        x='Time',
+        y='Usage',
+        color='Energy Type',
+        title=(
+            f'Energy Usage on {selected_date}'
+            if selected_date not in ['all', 'average']
+            else 'Energy Usage Over Time'
+        ),
+        labels={'Time': time_label, 'Usage': 'Energy Usage'}
+    )
+    fig.update_layout(uirevision=f'{selected_energy_type}-{selected_date}')
+    if x_range:
+        fig.update_xaxes(range=list(x_range))
+
+    energy_label_map = {opt['value']: opt['label'] for opt in energy_meter_options}
+
+    if selected_energy_type != 'all':
+        pretty = energy_label_map.get(selected_energy_type, 'Usage')
+        fig.update_yaxes(title_text=pretty)
+
+    for trace in fig.data:
+        raw_name = trace.name
+        trace.name = energy_label_map.get(raw_name, raw_name)
+
+    return fig
+
 @app.callback(
     [Output('output-container', 'children'),
      Output('date-dropdown', 'options'),
@@ -142,19 +323,17 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
     if not session.get('logged_in'):  # Check if the user is logged in
         return dash.no_update, dash.no_update, dash.no_update, dash.no_update
 
-    if not data:
-        logging.error("Data is empty or None.")
-        return dash.no_update, [], None, dash.no_update
+    if not is_ready():
+        return html.Div(loading_message()), [], None, dash.no_update
 
-    # Convert data-store to DataFrame
-    try:
-        df_combined = pd.DataFrame(data)
-    except Exception as e:
-        logging.error(f"Error converting data to DataFrame: {e}")
+    # Resolve the data-store handle to the server-side DataFrame
+    df_combined = resolve_dataset(data)
+    if df_combined is None or df_combined.empty:
+        logging.error("Data is empty or None.")
         return dash.no_update, [], None, dash.no_update
 
     # Ensure required columns exist
-    if 'Date' not in df_combined.columns or 'Time' not in df_combined.columns:
+    if not is_compact(df_combined):
         logging.error("Required columns 'Date' or 'Time' are missing.")
         return dash.no_update, [], None, dash.no_update
 
@@ -163,7 +342,7 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
         date_options = [
             {'label': 'All Dates', 'value': 'all'},
             {'label': 'All Dates (Average)', 'value': 'average'}
-        ] + [{'label': date, 'value': date} for date in df_combined['Date'].unique()]
+        ] + [{'label': day, 'value': day} for day in day_labels(get_day_index(df_combined)['days'])]
         if selected_date is None and date_options:
             selected_date = date_options[0]['value']
     except Exception as e:
@@ -172,19 +351,10 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
 
     # Filter or aggregate data by date
     try:
-        if selected_date == 'all':
-            df_filtered = df_combined
-        elif selected_date == 'average':
-            numeric_columns = df_combined.select_dtypes(include='number').columns
-            if numeric_columns.empty:
-                logging.error("No numeric columns available for averaging.")
-                return dash.no_update, date_options, selected_date, dash.no_update
-            df_filtered = df_combined.groupby('Time')[numeric_columns].mean().reset_index()
-            df_filtered['Date'] = 'Average'
-            columns_order = ['Date'] + [col for col in df_filtered.columns if col != 'Date']
-            df_filtered = df_filtered[columns_order]
-        else:
-            df_filtered = df_combined[df_combined['Date'] == selected_date]
+        df_filtered = filter_by_date(data, df_combined, selected_date)
+        if df_filtered is None:
+            logging.error("No numeric columns available for averaging.")
+            return dash.no_update, date_options, selected_date, dash.no_update
     except Exception as e:
         logging.error(f"Error filtering or aggregating data: {e}")
         return dash.no_update, date_options, selected_date, dash.no_update
@@ -193,7 +363,7 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
     try:
         if selected_energy_type and selected_energy_type != 'all':
             if selected_energy_type in df_filtered.columns:
-                df_filtered = df_filtered[['Date', 'Time', selected_energy_type]]
+                df_filtered = df_filtered[key_columns(df_filtered) + [selected_energy_type]]
             else:
                 logging.error(f"Selected energy type '{selected_energy_type}' not found in columns.")
                 return dash.no_update, date_options, selected_date, dash.no_update
@@ -207,12 +377,20 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
     # Render table or graph
     if view_type == 'table':
         try:
-            columns = [{"name": energy_type_mapping.get(col, col), "id": col} for col in df_filtered.columns]
+            # Rows are paged, sorted and filtered on the server by update_table_page
+            columns = [{"name": energy_type_mapping.get(col, col), "id": col} for col in label_names(df_filtered.columns)]
             return (
                 dash_table.DataTable(
-                    data=df_filtered.to_dict('records'),
+                    id='dashboard-table',
                     columns=columns,
-                    page_size=len(df_filtered),
+                    page_action='custom',
+                    page_current=0,
+                    page_size=DEFAULT_PAGE_SIZE,
+                    sort_action='custom',
+                    sort_mode='multi',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query='',
                     style_table={'maxHeight': '500px', 'overflowY': 'auto', 'border': 'none'},
                     style_cell={'textAlign': 'left', 'padding': '10px'},
                     style_header={'backgroundColor': 'lightgrey', 'fontWeight': 'bold'}
@@ -236,14 +414,25 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
             # Get the readable name for display
             readable_energy_type = energy_type_mapping.get(energy_column_for_heatmap, energy_column_for_heatmap)
 
-            if energy_column_for_heatmap in df_filtered.columns:
-                df_filtered_heatmap = df_filtered.pivot(index='Time', columns='Date', values=energy_column_for_heatmap)
-
-                fig = px.imshow(
-                    df_filtered_heatmap,
-                    labels=dict(x="Date", y="Time", color=readable_energy_type),
-                    title=f"Heatmap for {readable_energy_type}"
-                )
+            # The (time slot x day) matrix is cached per dataset version, so no pivot is needed here
+            heatmap = get_heatmap_matrices(data)
+            if energy_column_for_heatmap in heatmap['matrices']:
+                def build_heatmap_figure():
+                    z, x, y = select_heatmap(heatmap, energy_column_for_heatmap, selected_date)
+                    fig = go.Figure(go.Heatmap(
+                        z=z,
+                        x=x,
+                        y=y,
+                        colorbar=dict(title=readable_energy_type),
+                        hovertemplate=f"Date: %{{x}}<br>Time: %{{y}}<br>{readable_energy_type}: %{{z}}<extra></extra>"
+                    ))
+                    fig.update_layout(title=f"Heatmap for {readable_energy_type}", xaxis_title="Date", yaxis_title="Time")
+                    fig.update_xaxes(type='category')
+                    fig.update_yaxes(autorange='reversed', type='category')
+                    return fig
+
+                # Rendered figures are shared between workers, keyed by dataset version
+                fig = resolve_figure(data, f'heatmap:{energy_column_for_heatmap}:{selected_date}', build_heatmap_figure)
                 return dcc.Graph(figure=fig), date_options, selected_date, selected_energy_type
             else:
                 logging.error(f"Selected energy type '{selected_energy_type}' not found in the filtered data.")
@@ -256,52 +445,88 @@ def update_combined(view_type, selected_energy_type, selected_date, data):
 
     elif view_type == 'graph':
         try:
-            df_melted = df_filtered.melt(
-                id_vars=['Time', 'Date'],
-                value_vars=(
-                    [selected_energy_type]
-                    if selected_energy_type != 'all'
-                    else df_filtered.columns.difference(['Date', 'Time'])
-                ),
-                var_name='Energy Type',
-                value_name='Usage'
+            fig = resolve_figure(
+                data, f'line:{selected_energy_type}:{selected_date}',
+                # The whole dataset goes in for 'all' so its timestamps are reused; value_vars picks the meter
+                lambda: build_line_figure(
+                    df_combined if selected_date == 'all' else df_filtered, selected_energy_type, selected_date
+                )
             )
+            return dcc.Graph(id='dashboard-graph', figure=fig), date_options, selected_date, selected_energy_type
 
-            # Build basic figure
-            fig = px.line(
-                df_melted,
-                x='Time',
-                y='Usage',
-                color='Energy Type',
-                title=(
-                    f'Energy Usage on {selected_date}'
-                    if selected_date not in ['all', 'average']
-                    else 'Energy Usage Over Time'
-                ),
-                labels={'Time': 'Time of Day', 'Usage': 'Energy Usage'}
-            )
 
-            energy_label_map = {opt['value']: opt['label'] for opt in energy_meter_options}
+        except Exception as e:
 
-            if selected_energy_type != 'all':
-                pretty = energy_label_map.get(selected_energy_type, 'Usage')
-                fig.update_yaxes(title_text=pretty)
+            logging.error(f"Error creating graph view: {e}")
 
+            return dash.no_update, date_options, selected_date, dash.no_update
+    return None
 
-            for trace in fig.data:
-                raw_name = trace.name
-                trace.name = energy_label_map.get(raw_name, raw_name)
 
-            return dcc.Graph(figure=fig), date_options, selected_date, selected_energy_type
+@app.callback(
+    Output('dashboard-graph', 'figure'),
+    [Input('dashboard-graph', 'relayoutData')],
+    [State('energy-type-dropdown', 'value'),
+     State('date-dropdown', 'value'),
+     State('data-store', 'data')],
+    prevent_initial_call=True
+)
+def zoom_line_graph(relayout_data, selected_energy_type, selected_date, data):
+    # Only the "All Dates" graph is downsampled, so only it needs re-querying on zoom
+    if not session.get('logged_in') or not relayout_data or selected_date != 'all':
+        return dash.no_update
+
+    if 'xaxis.range[0]' in relayout_data:
+        x_range = (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+    elif 'xaxis.range' in relayout_data:
+        x_range = tuple(relayout_data['xaxis.range'])
+    elif relayout_data.get('xaxis.autorange'):
+        x_range = None
+    else:
+        return dash.no_update
 
+    df_combined = resolve_dataset(data)
+    if df_combined is None or df_combined.empty:
+        return dash.no_update
 
-        except Exception as e:
+    try:
+        # build_line_figure plots only the selected meter, and the timestamps need the whole frame
+        return build_line_figure(df_combined, selected_energy_type, selected_date, x_range)
+    except Exception as e:
+        logging.error(f"Error re-rendering graph view: {e}")
+        return dash.no_update
 
-            logging.error(f"Error creating graph view: {e}")
+@app.callback(
+    [Output('dashboard-table', 'data'),
+     Output('dashboard-table', 'page_count')],
+    [Input('dashboard-table', 'page_current'),
+     Input('dashboard-table', 'page_size'),
+     Input('dashboard-table', 'sort_by'),
+     Input('dashboard-table', 'filter_query')],
+    [State('energy-type-dropdown', 'value'),
+     State('date-dropdown', 'value'),
+     State('data-store', 'data')]
+)
+def update_table_page(page_current, page_size, sort_by, filter_query, selected_energy_type, selected_date, data):
+    if not session.get('logged_in'):  # Check if the user is logged in
+        return dash.no_update, dash.no_update
 
-            return dash.no_update, date_options, selected_date, dash.no_update
-    return None
+    df_combined = resolve_dataset(data)
+    if df_combined is None or df_combined.empty:
+        return [], 1
 
+    try:
+        df_filtered = filter_by_date(data, df_combined, selected_date or 'all')
+        if df_filtered is None:
+            return [], 1
+        if selected_energy_type and selected_energy_type != 'all' and selected_energy_type in df_filtered.columns:
+            df_filtered = df_filtered[key_columns(df_filtered) + [selected_energy_type]]
+
+        # Only the requested page is sent to the browser
+        return get_page(df_filtered, page_current, page_size, sort_by, filter_query)
+    except Exception as e:
+        logging.error(f"Error paging table view: {e}")
+        return dash.no_update, dash.no_update
 
 @app.callback(
     [Output('toolbar-collapse', 'is_open'),
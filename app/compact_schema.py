@@ -0,0 +1,167 @@
+# app/compact_schema.py
+"""The in-memory layout of the meter dataset.
+
+Each row is one reading slot: ``Day`` (int32 days since 1970-01-01), ``Slot``
+(int16 minutes after midnight, 1440 being the 24:00:00 reading) and one
+float32 column per meter. Frames are sorted by (Day, Slot). The Date and Time
+labels are only produced when something is rendered or stored.
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+
+DAY = 'Day'
+SLOT = 'Slot'
+KEY_COLUMNS = [DAY, SLOT]
+
+# The label columns the compact ones stand for, as read from the workbooks and shown in the dashboard
+LABEL_NAMES = {DAY: 'Date', SLOT: 'Time'}
+SOURCE_COLUMNS = {label: column for column, label in LABEL_NAMES.items()}
+
+DAY_DTYPE = np.int32
+SLOT_DTYPE = np.int16
+READING_DTYPE = np.float32
+# apply_pulse_ratios rounds readings to this many decimals, so float32 readings render back exactly
+READING_DECIMALS = 3
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SLOT_LABELS = np.array([f"{minute // 60:02d}:{minute % 60:02d}:00" for minute in range(24 * 60 + 1)])
+
+
+def parse_day(value):
+    """Day number of a date, Timestamp or 'YYYY-MM-DD' string; raises ValueError if it isn't a date."""
+    return pd.Timestamp(value).toordinal() - _EPOCH_ORDINAL
+
+
+def parse_slot(value):
+    # 'HH:MM', 'HH:MM:SS' or a datetime.time; seconds are dropped
+    if hasattr(value, 'hour'):
+        return value.hour * 60 + value.minute
+    hours, minutes = str(value).split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _convert_unique(values, parse, dtype):
+    # Dates and times repeat on every row, so each distinct value is parsed once
+    codes, uniques = pd.factorize(pd.Series(values), sort=False)
+    converted = np.array([parse(value) for value in uniques], dtype=dtype)
+    return converted[codes]
+
+
+def to_days(values):
+    return _convert_unique(values, parse_day, DAY_DTYPE)
+
+
+def to_slots(values):
+    return _convert_unique(values, parse_slot, SLOT_DTYPE)
+
+
+def day_labels(days):
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype(str)
+
+
+def day_label(day):
+    return str(np.datetime64(int(day), 'D'))
+
+
+def day_dates(days):
+    # datetime.date objects, for the database
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype(object)
+
+
+def slot_labels(slots):
+    return _SLOT_LABELS[np.asarray(slots, dtype=np.int64)]
+
+
+def slot_label(slot):
+    return str(_SLOT_LABELS[int(slot)])
+
+
+def readings(values):
+    """float64 readings with the float32 noise rounded away, for sums and rendering."""
+    return np.round(np.asarray(values, dtype=np.float64), READING_DECIMALS)
+
+
+def row_timestamps(df):
+    # datetime64 of each row's day and slot, without parsing any strings
+    minutes = df[DAY].to_numpy(dtype=np.int64) * (24 * 60) + df[SLOT].to_numpy(dtype=np.int64)
+    return minutes.astype('datetime64[m]').astype('datetime64[ns]')
+
+
+def build_day_index(df):
+    """Each day's first row in the sorted frame: rows of ``days[i]`` are ``offsets[i]:offsets[i + 1]``."""
+    days = df[DAY].to_numpy(dtype=np.int64)
+    starts = np.flatnonzero(np.diff(days)) + 1
+    return {
+        'days': days[np.concatenate([[0], starts])] if len(days) else days,
+        'offsets': np.concatenate([[0], starts, [len(days)]]) if len(days) else np.zeros(1, dtype=np.int64)
+    }
+
+
+def day_rows(day_index, first_day=None, last_day=None):
+    # (start, stop) row positions of the days between first_day and last_day (inclusive), by binary search
+    days, offsets = day_index['days'], day_index['offsets']
+    first = 0 if first_day is None else np.searchsorted(days, first_day, side='left')
+    last = len(days) if last_day is None else np.searchsorted(days, last_day, side='right')
+    return int(offsets[first]), int(offsets[max(first, last)])
+
+
+def slice_days(df, day_index, first_day=None, last_day=None):
+    # A positional slice, so no boolean mask is built and the rows are not copied
+    start, stop = day_rows(day_index, first_day, last_day)
+    return df.iloc[start:stop]
+
+
+def is_compact(df):
+    return DAY in df.columns and SLOT in df.columns
+
+
+def meter_columns(df):
+    return [col for col in df.columns if col not in LABEL_NAMES and col not in SOURCE_COLUMNS]
+
+
+def key_columns(df):
+    # The day and slot columns a frame has, compact or labelled, in display order
+    return [col for col in ('Date', DAY, 'Time', SLOT) if col in df.columns]
+
+
+def label_names(columns):
+    return [LABEL_NAMES.get(col, col) for col in columns]
+
+
+def to_compact(df):
+    """Convert a (Date, Time, meter...) frame to the compact layout, sorted by day and slot."""
+    columns = {DAY: to_days(df['Date']), SLOT: to_slots(df['Time'])}
+    for meter in meter_columns(df):
+        columns[meter] = pd.to_numeric(df[meter], errors='coerce').to_numpy(dtype=READING_DTYPE)
+    compact = pd.DataFrame(columns)
+    return compact.sort_values(KEY_COLUMNS, kind='stable', ignore_index=True)
+
+
+def ensure_compact(df):
+    # Labelled frames (from the workbooks, the database or older clients) are converted; anything else is returned as is
+    if df is None or is_compact(df) or not {'Date', 'Time'} <= set(df.columns):
+        return df
+    return to_compact(df)
+
+
+def with_compact_dtypes(df):
+    # concat and groupby can widen the columns; put them back to the compact types
+    dtypes = {col: READING_DTYPE for col in meter_columns(df)}
+    dtypes.update({DAY: DAY_DTYPE, SLOT: SLOT_DTYPE})
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+
+def to_labels(df):
+    """Date and Time labels and float64 readings in place of the compact columns, e.g. for a table page."""
+    columns = {}
+    for col in df.columns:
+        if col == DAY:
+            columns['Date'] = day_labels(df[DAY])
+        elif col == SLOT:
+            columns['Time'] = slot_labels(df[SLOT])
+        elif df[col].dtype == READING_DTYPE:
+            columns[col] = readings(df[col])
+        else:
+            columns[col] = df[col]
+    return pd.DataFrame(columns, index=df.index)
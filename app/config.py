@@ -23,4 +23,6 @@ conversion_factors = {
     'Gas m³': {'cost_per_unit': 0.0989, 'carbon_per_unit': 0.129},
     'Water 1 m³': {'cost_per_unit': 3.60, 'carbon_per_unit': 0.344},
     'Water 2 m³': {'cost_per_unit': 3.60, 'carbon_per_unit': 0.3389},
-}
\ No newline at end of file
+}
+# Maximum points per trace on the dashboard line graph before it is downsampled
+graph_point_budget = 2000
@@ -1,9 +1,39 @@
 from dash import Output, Input, State
+import numpy as np
 import pandas as pd
 import logging
 from app.config import energy_type_mapping, conversion_factors
 from dash import html
+from app.compact_schema import DAY, day_labels, meter_columns, parse_day
 from app.data_processing import convert_gas_to_kwh
+from app.dataset_registry import get_day_index, resolve_dataset, resolve_derived, resolve_rollups
+from app.warmup import is_ready, loading_message
+
+def build_usage_index(daily_totals):
+    # Cumulative (gas-converted) usage per meter over the sorted day numbers, with a leading row of zeros
+    totals = convert_gas_to_kwh(daily_totals.copy()).fillna(0).sort_index()
+    cumulative = np.zeros((len(totals) + 1, len(totals.columns)))
+    np.cumsum(totals.to_numpy(dtype=float), axis=0, out=cumulative[1:])
+    return {
+        'days': totals.index.to_numpy(dtype=np.int64),
+        'meters': list(totals.columns),
+        'cumulative': cumulative
+    }
+
+def _build_usage_index_from_rollups(data):
+    rollups = resolve_rollups(data)
+    return None if rollups is None else build_usage_index(rollups['daily_totals'])
+
+def get_usage_index(data):
+    # Built from the daily rollups once per dataset version; None if the version is no longer available
+    return resolve_derived(data, 'usage_index', lambda df: _build_usage_index_from_rollups(data))
+
+def range_usage(usage_index, start_date=None, end_date=None):
+    """Total usage per meter between two dates (inclusive) as a Series indexed by meter."""
+    days, cumulative = usage_index['days'], usage_index['cumulative']
+    start = 0 if start_date is None else np.searchsorted(days, parse_day(start_date), side='left')
+    end = len(days) if end_date is None else np.searchsorted(days, parse_day(end_date), side='right')
+    return pd.Series(cumulative[max(start, end)] - cumulative[start], index=usage_index['meters'])
 
 def register_costs_and_carbon_callbacks(app):
     @app.callback(
@@ -14,25 +44,26 @@ def register_costs_and_carbon_callbacks(app):
         [Input('data-store', 'data')]
     )
     def update_costs_and_carbon_dropdowns(data):
+        if not is_ready():
+            return [], None, [], []
         if not data:
             logging.error("Data is empty or None in costs_and_carbon.")
             return [], None, [], []
 
         try:
-            df = pd.DataFrame(data)
-            df = convert_gas_to_kwh(df)  # Ensure gas is converted
-
-            # Ensure 'Date' column is datetime
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                available_dates = df['Date'].dropna().dt.date.unique()
-                date_options = [{'label': str(date), 'value': str(date)} for date in sorted(available_dates)]
+            df = resolve_dataset(data)
+            if df is None:
+                logging.error("Dataset version is not available in costs_and_carbon.")
+                return [], None, [], []
+
+            if DAY in df.columns:
+                date_options = [{'label': day, 'value': day} for day in day_labels(get_day_index(df)['days'])]
             else:
                 logging.error("'Date' column is missing in the data.")
                 date_options = []
 
             # Energy type dropdown options
-            energy_columns = [col for col in df.columns if col not in ['Date', 'Time']]
+            energy_columns = meter_columns(df)
             energy_options = [{'label': 'All Energy Types', 'value': 'all'}] + [
                 {'label': energy_type_mapping.get(col, col), 'value': col} for col in energy_columns
             ]
@@ -58,37 +89,32 @@ def register_costs_and_carbon_callbacks(app):
             return "No data to calculate."
 
         try:
-            df = pd.DataFrame(data)
-            df = convert_gas_to_kwh(df)  # Ensure gas is converted
-
-            # Ensure 'Date' column is datetime
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+            usage_index = get_usage_index(data)
+            if usage_index is None:
+                return "No data to calculate."
 
-            # Filter data by date range
+            # Usage per meter over the date range is two lookups into the prefix sums
             if start_date and end_date:
-                df = df[(df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))]
+                usage = range_usage(usage_index, start_date, end_date)
+            else:
+                usage = range_usage(usage_index)
 
             # Handle "All" energy types
             if energy_type == 'all':
                 total_cost = 0
                 total_carbon = 0
-                for col in df.columns:
-                    if col not in ['Date', 'Time']:
-                        readable_energy_type = energy_type_mapping.get(col, col)
-                        conversion = conversion_factors.get(readable_energy_type, {})
-                        if conversion:
-                            cost_per_unit = conversion['cost_per_unit']
-                            carbon_per_unit = conversion['carbon_per_unit']
-                            total_cost += (df[col] * cost_per_unit).sum()
-                            total_carbon += (df[col] * carbon_per_unit).sum()
+                for col, col_usage in usage.items():
+                    readable_energy_type = energy_type_mapping.get(col, col)
+                    conversion = conversion_factors.get(readable_energy_type, {})
+                    if conversion:
+                        total_cost += col_usage * conversion['cost_per_unit']
+                        total_carbon += col_usage * conversion['carbon_per_unit']
 
                 return (f"Total Cost: £{total_cost:.2f}, "
                         f"Total Carbon Emissions: {total_carbon:.2f} kgCO2")
 
             # Filter by specific energy type
-            if energy_type in df.columns:
-                df = df[['Date', 'Time', energy_type]]
-            else:
+            if energy_type not in usage.index:
                 return f"Energy type '{energy_type}' not found in data."
 
             # Apply conversion factors
@@ -97,15 +123,9 @@ def register_costs_and_carbon_callbacks(app):
             if not conversion:
                 return f"No conversion factors available for '{readable_energy_type}'."
 
-            cost_per_unit = conversion['cost_per_unit']
-            carbon_per_unit = conversion['carbon_per_unit']
-
-            df['Cost (£)'] = df[energy_type] * cost_per_unit
-            df['Carbon Emissions (kgCO2)'] = df[energy_type] * carbon_per_unit
-
             # Summarize results
-            total_cost = df['Cost (£)'].sum()
-            total_carbon = df['Carbon Emissions (kgCO2)'].sum()
+            total_cost = usage[energy_type] * conversion['cost_per_unit']
+            total_carbon = usage[energy_type] * conversion['carbon_per_unit']
 
             return (f"Total Cost: £{total_cost:.2f}, "
                     f"Total Carbon Emissions: {total_carbon:.2f} kgCO2")
@@ -119,26 +139,28 @@ def register_costs_and_carbon_callbacks(app):
         [Input('data-store', 'data')]
     )
     def update_costs_summary(data):
+        if not is_ready():
+            return loading_message()
         if not data:
             return "No data available for summary."
 
         try:
-            df = pd.DataFrame(data)
-            df = convert_gas_to_kwh(df)  # Ensure gas is converted
-
-            # Ensure 'Date' column is datetime
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+            # Per-meter totals to date are the last row of the prefix-sum index
+            usage_index = get_usage_index(data)
+            if usage_index is None:
+                return "No data available for summary."
+            totals = range_usage(usage_index)
 
             # Initialize summary dictionary
             summary = {}
 
             # Calculate total costs for each energy type
             for energy_type, readable_name in energy_type_mapping.items():
-                if energy_type in df.columns and readable_name != 'All Energy Types':
+                if energy_type in totals.index and readable_name != 'All Energy Types':
                     conversion = conversion_factors.get(readable_name, {})
                     if conversion:
                         cost_per_unit = conversion['cost_per_unit']
-                        total_cost = (df[energy_type] * cost_per_unit).sum()
+                        total_cost = totals[energy_type] * cost_per_unit
                         summary[readable_name] = total_cost
 
             # Calculate total cost across all energy types
@@ -160,26 +182,28 @@ def register_costs_and_carbon_callbacks(app):
         [Input('data-store', 'data')]
     )
     def update_carbon_summary(data):
+        if not is_ready():
+            return loading_message()
         if not data:
             return "No data available for summary."
 
         try:
-            df = pd.DataFrame(data)
-            df = convert_gas_to_kwh(df)  # Ensure gas is converted
-
-            # Ensure 'Date' column is datetime
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+            # Per-meter totals to date are the last row of the prefix-sum index
+            usage_index = get_usage_index(data)
+            if usage_index is None:
+                return "No data available for summary."
+            totals = range_usage(usage_index)
 
             # Initialize summary dictionary
             summary = {}
 
             # Calculate total carbon emissions for each energy type
             for energy_type, readable_name in energy_type_mapping.items():
-                if energy_type in df.columns and readable_name != 'All Energy Types':
+                if energy_type in totals.index and readable_name != 'All Energy Types':
                     conversion = conversion_factors.get(readable_name, {})
                     if conversion:
                         carbon_per_unit = conversion['carbon_per_unit']
-                        total_carbon = (df[energy_type] * carbon_per_unit).sum()
+                        total_carbon = totals[energy_type] * carbon_per_unit
                         summary[readable_name] = total_carbon
 
             # Calculate total carbon emissions across all energy types
@@ -7,38 +7,72 @@ import io
 import zipfile
 import openpyxl
 import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.compact_schema import DAY, KEY_COLUMNS, ensure_compact, is_compact, with_compact_dtypes
 from app.config import pulse_ratios, energy_type_mapping
+from app.workbook_cache import load_workbooks
 
 # Dynamically construct the path to the CSV_files folder
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # Get the project root directory
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'CSV_files')  # Path to the CSV_files folder
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def process_uploaded_file(contents, filename, existing_data):
+# Number of processes used to parse workbooks during ingest (1 = serial)
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '1'))
+
+def _has_contents(path, raw):
+    # The size check avoids reading files that can't match
+    if not os.path.exists(path) or os.path.getsize(path) != len(raw):
+        return False
+    with open(path, 'rb') as f:
+        return f.read() == raw
+
+def save_uploaded_files(files):
+    for save_path, raw in files:
+        try:
+            # Skip workbooks that are already in the upload folder; a corrected re-upload is written over the old one
+            if _has_contents(save_path, raw):
+                continue
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+            with open(save_path, 'wb') as out_file:
+                out_file.write(raw)
+        except Exception as e:
+            logging.error(f"Error saving uploaded file {save_path}: {e}")
+
+def process_uploaded_file(contents, filename, existing_data, background_save=True, progress=None):
     content_type, content_string = contents.split(',')
     decoded = base64.b64decode(content_string)
 
     try:
         if filename.endswith('.zip'):
-            zip_file = io.BytesIO(decoded)
-            with zipfile.ZipFile(zip_file, 'r') as z:
+            # Parse every workbook straight from the archive bytes and concatenate once at the end
+            frames = [] if existing_data is None else [pd.DataFrame(existing_data)]
+            files_to_save = []
+            with zipfile.ZipFile(io.BytesIO(decoded), 'r') as z:
                 for file in z.namelist():
                     if file.endswith('.xlsx'):
-                        with z.open(file) as f:
-                            date_key = os.path.basename(file).split('_')[0] if '_' in file else 'Unknown'
-                            folder_path = os.path.join(UPLOAD_FOLDER, date_key)
-                            os.makedirs(folder_path, exist_ok=True)
-                            save_path = os.path.join(folder_path, file)
-                            with open(save_path, 'wb') as out_file:
-                                out_file.write(f.read())
-
-                            # Process the extracted .xlsx file
-                            df_new = pd.read_excel(save_path, engine='openpyxl')
-                            df_new['Date'] = pd.to_datetime(date_key)
-                            if existing_data is None:
-                                existing_data = df_new
-                            else:
-                                existing_data = pd.concat([pd.DataFrame(existing_data), df_new], ignore_index=True)
+                        raw = z.read(file)
+                        date_key = os.path.basename(file).split('_')[0] if '_' in file else 'Unknown'
+                        save_path = os.path.join(UPLOAD_FOLDER, date_key, os.path.basename(file))
+                        files_to_save.append((save_path, raw))
+
+                        df_new = pd.read_excel(io.BytesIO(raw), engine='openpyxl')
+                        df_new['Date'] = pd.to_datetime(date_key)
+                        frames.append(df_new)
+                        if progress is not None:
+                            progress(file)
+
+            # Writing the raw workbooks to CSV_files does not need to hold up the upload
+            if background_save:
+                threading.Thread(target=save_uploaded_files, args=(files_to_save,)).start()
+            else:
+                save_uploaded_files(files_to_save)
+
+            if not frames:
+                return existing_data
+            existing_data = pd.concat(frames, ignore_index=True)
 
             # Ensure sorting and grouping after processing all files
             if 'Date' in existing_data.columns and 'Time' in existing_data.columns:
@@ -58,6 +92,8 @@ def process_uploaded_file(contents, filename, existing_data):
             if filename.endswith('.xlsx'):
                 df_new = pd.read_excel(io.BytesIO(decoded), engine='openpyxl')
                 df_new['Date'] = pd.to_datetime(date_key)
+                if progress is not None:
+                    progress(filename)
                 if existing_data is None:
                     existing_data = df_new
                 else:
@@ -75,22 +111,75 @@ def process_uploaded_file(contents, filename, existing_data):
         logging.error(f"Error processing file {filename}: {e}")
         raise
 
-def load_initial_csv_data(path=UPLOAD_FOLDER):
-    logging.debug(f"Loading data from {path}")
-    all_files = glob.glob(os.path.join(path, '**', '*.xlsx'), recursive=True)
-    combined_data = []
-    for filename in all_files:
-        try:
-            # Read the Excel file
-            df = pd.read_excel(filename, engine='openpyxl')
+def read_meter_workbook(filename):
+    # Read the Excel file
+    df = pd.read_excel(filename, engine='openpyxl')
 
-            # Ensure the `Date` column is in the correct format
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date']).dt.date  # Keep only the date part
+    # Ensure the `Date` column is in the correct format
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date']).dt.date  # Keep only the date part
 
-            combined_data.append(df)
-        except Exception as e:
-            logging.error(f"Error processing file {filename}: {e}")
+    return df
+
+def _read_meter_workbook_timed(filename):
+    # Runs in a worker process, so errors are returned rather than logged here
+    start = time.perf_counter()
+    try:
+        df, error = read_meter_workbook(filename), None
+    except Exception as e:
+        df, error = None, str(e)
+    return filename, df, error, time.perf_counter() - start
+
+def parse_workbooks(filenames, workers=1, timings=None):
+    if workers > 1 and len(filenames) > 1:
+        # openpyxl parsing is pure Python and CPU-bound, so fan out across processes
+        chunksize = max(1, len(filenames) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_read_meter_workbook_timed, filenames, chunksize=chunksize))
+    else:
+        results = [_read_meter_workbook_timed(filename) for filename in filenames]
+
+    parsed = []
+    for filename, df, error, seconds in results:
+        if error is not None:
+            logging.error(f"Error processing file {filename}: {error}")
+        if timings is not None:
+            timings.append({
+                'file': filename,
+                'seconds': seconds,
+                'rows': 0 if df is None else len(df),
+                'error': error
+            })
+        parsed.append((filename, df))
+    return parsed
+
+def load_initial_csv_data(path=UPLOAD_FOLDER, use_cache=True, workers=None, timings=None, changed=None):
+    logging.debug(f"Loading data from {path}")
+    all_files = glob.glob(os.path.join(path, '**', '*.xlsx'), recursive=True)
+    workers = INGEST_WORKERS if workers is None else workers
+    if timings is None:
+        timings = []
+    start = time.perf_counter()
+
+    def parse(filenames):
+        return parse_workbooks(filenames, workers=workers, timings=timings)
+
+    if use_cache:
+        # Only new or changed workbooks are parsed, everything else comes from the Parquet cache
+        combined_data = load_workbooks(path, all_files, parse, changed=changed)
+    else:
+        combined_data = [df for _, df in parse(all_files) if df is not None]
+        if changed is not None:
+            changed.extend(combined_data)
+
+    if timings:
+        parse_seconds = sum(timing['seconds'] for timing in timings)
+        slowest = max(timings, key=lambda timing: timing['seconds'])
+        logging.info(
+            f"Parsed {len(timings)} of {len(all_files)} workbooks with {workers} worker(s) "
+            f"in {time.perf_counter() - start:.2f}s (CPU {parse_seconds:.2f}s, "
+            f"slowest {os.path.basename(slowest['file'])} {slowest['seconds']:.3f}s)"
+        )
 
     if not combined_data:
         logging.error("No files found in the upload folder.")
@@ -112,6 +201,30 @@ def apply_pulse_ratios(df, pulse_ratios):
             df[column] = (df[column] * ratio).round(3)
     return df
 
+def merge_uploaded_data(df_existing, df_uploaded, pulse_ratios):
+    # Splice freshly uploaded rows into the current dataset without reloading the whole archive; returns a compact frame
+    if df_uploaded is None or df_uploaded.empty:
+        return df_existing
+
+    df_uploaded = apply_pulse_ratios(df_uploaded.copy(), pulse_ratios)  # Only the new rows need scaling
+    df_uploaded = ensure_compact(df_uploaded)
+
+    if df_existing is None or df_existing.empty:
+        df_existing = df_uploaded.iloc[0:0]
+    df_existing = ensure_compact(df_existing)
+    if not is_compact(df_existing) or not is_compact(df_uploaded):
+        return pd.concat([df_existing, df_uploaded], ignore_index=True)
+
+    # Only the days touched by the upload need to be regrouped. Uploaded rows come first so a re-uploaded
+    # day corrects the readings; existing values only fill in meters the upload doesn't have
+    affected = df_existing[DAY].isin(set(df_uploaded[DAY]))
+    df_affected = pd.concat([df_uploaded, df_existing[affected]], ignore_index=True)
+    df_affected = df_affected.sort_values(by=KEY_COLUMNS, kind='stable')
+    df_affected = df_affected.groupby(KEY_COLUMNS, as_index=False).first()
+
+    df_merged = pd.concat([df_existing[~affected], df_affected], ignore_index=True)
+    return with_compact_dtypes(df_merged.sort_values(by=KEY_COLUMNS, kind='stable', ignore_index=True))
+
 def get_processed_data():
     df = load_initial_csv_data()
     df = apply_pulse_ratios(df, pulse_ratios)
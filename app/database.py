@@ -1,16 +1,54 @@
 # app/database.py
+import logging
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import String, create_engine, delete, func, inspect, select, text
 from werkzeug.security import generate_password_hash
 
 db = SQLAlchemy()
 
+def _migrate_uploaded_data_time():
+    # uploaded_data.time used to be a TIME column; the COPY path moves 'HH:MM:SS' text from a varchar
+    # staging table into it, which PostgreSQL rejects, so databases created before the change are converted
+    if db.engine.dialect.name != 'postgresql':
+        return
+    columns = {column['name']: column['type'] for column in inspect(db.engine).get_columns('uploaded_data')}
+    if 'time' in columns and not isinstance(columns['time'], String):
+        logging.info("Converting uploaded_data.time to varchar(8)")
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "ALTER TABLE uploaded_data ALTER COLUMN time TYPE varchar(8) USING left(time::text, 8)"
+            ))
+
+def _drop_duplicate_saved_collections():
+    # Saves used to insert duplicates, which would stop the unique index from being created; keep the first of each
+    from app.models import SavedCollection
+
+    table = SavedCollection.__table__
+    first_ids = (
+        select(func.min(table.c.id))
+        .group_by(table.c.group_name, table.c.energy_type, table.c.date)
+        .scalar_subquery()
+    )
+    with db.engine.begin() as connection:
+        removed = connection.execute(delete(table).where(table.c.id.not_in(first_ids))).rowcount
+    if removed:
+        logging.info(f"Removed {removed} duplicate saved collection entries")
+
 def init_db(app):
     db.init_app(app)
     with app.app_context():
-        from app.models import User, SavedCollection
+        from app.models import User, SavedCollection, UploadedData
 
         db.create_all()
+        _migrate_uploaded_data_time()
+
+        # create_all does not touch tables that already exist, so add any missing indexes. The inserts rely on
+        # the unique ones for ON CONFLICT, so a failure here stops the app instead of surfacing on the first save
+        inspector = inspect(db.engine)
+        if not all(inspector.has_index('saved_collection', index.name) for index in SavedCollection.__table__.indexes):
+            _drop_duplicate_saved_collections()
+        for index in [*SavedCollection.__table__.indexes, *UploadedData.__table__.indexes]:
+            index.create(db.engine, checkfirst=True)
 
         # Add a default test user if it doesn't already exist
         if not User.query.filter_by(username="testuser").first():
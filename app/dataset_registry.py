@@ -0,0 +1,283 @@
+# app/dataset_registry.py
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+from app.compact_schema import build_day_index, ensure_compact, is_compact
+from app.instrumentation import record_rows
+from app.rollups import build_rollups, update_rollups
+from app.shared_cache import DATASET_TTL, get_shared_cache
+
+# Only a handful of dataset versions are kept in memory; handles to older ones are reported as expired
+MAX_VERSIONS = 4
+
+# version -> {'df': DataFrame, 'rollups': dict of aggregate tables, 'derived': lazily built structures}
+_datasets = OrderedDict()
+_current_version = None
+_lock = threading.Lock()
+
+# name -> updater(previous, df_old, df_new, changed_days) for derived structures carried across uploads
+_incremental_updaters = {}
+
+
+def register_incremental_update(name, updater):
+    _incremental_updaters[name] = updater
+
+
+def dataset_version(df):
+    # Derived from the contents so every worker that loads the same archive agrees on the version
+    digest = hashlib.sha1()
+    digest.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+ROLLUP_NAMES = ['daily_totals', 'daily_max', 'daily_max_time', 'time_sums', 'time_counts']
+
+
+def _load_shared_rollups(version):
+    # Another worker may already have aggregated this version
+    cache = get_shared_cache()
+    if not cache.shared:
+        return None
+    rollups = {name: cache.get_frame(f'rollups:{version}:{name}') for name in ROLLUP_NAMES}
+    return None if any(table is None for table in rollups.values()) else rollups
+
+
+def _share_dataset(version, df, rollups):
+    cache = get_shared_cache()
+    # Without redis there is no other worker to share with, and _datasets already holds the frame
+    if not cache.shared:
+        return
+    if not cache.exists(f'dataset:{version}'):
+        cache.set_frame(f'dataset:{version}', df)
+        for name, table in (rollups or {}).items():
+            cache.set_frame(f'rollups:{version}:{name}', table)
+
+
+def _share_current_version(version):
+    # Written after the dataset itself, so a worker that follows the pointer can load the version
+    cache = get_shared_cache()
+    if cache.shared:
+        cache.set_bytes('dataset:current', version.encode('utf-8'), DATASET_TTL)
+
+
+def _compute_rollups(df, version, base_version, changed_days):
+    if not is_compact(df):
+        return None
+    shared_rollups = _load_shared_rollups(version)
+    if shared_rollups is not None:
+        return shared_rollups
+    base = _datasets.get(base_version)
+    if base is not None and base['rollups'] is not None and changed_days is not None:
+        # Only the days touched by an upload are re-aggregated
+        return update_rollups(base['rollups'], base['df'], df, changed_days)
+    return build_rollups(df)
+
+
+def _carry_derived(df, base_version, changed_days):
+    base = _datasets.get(base_version)
+    if base is None or changed_days is None:
+        return {}
+    return {
+        name: updater(base['derived'][name], base['df'], df, changed_days)
+        for name, updater in _incremental_updaters.items()
+        if name in base['derived']
+    }
+
+
+def publish_dataset(df, base_version=None, changed_days=None):
+    """Register ``df`` as the current dataset and return its version.
+
+    When ``df`` was derived from ``base_version`` by replacing the rows for
+    ``changed_days`` (day numbers, see app/compact_schema.py), the rollups and
+    any registered incremental structures are updated instead of rebuilt.
+    Labelled (Date, Time) frames are converted to the compact layout first.
+    """
+    global _current_version
+    df = ensure_compact(df)
+    version = dataset_version(df)
+    with _lock:
+        is_new = version not in _datasets
+        if is_new:
+            _store(version, df, _compute_rollups(df, version, base_version, changed_days),
+                   _carry_derived(df, base_version, changed_days))
+        _current_version = version
+        entry = _datasets[version]
+
+    # Make the version available to the other workers, then point them at it
+    if is_new:
+        _share_dataset(version, df, entry['rollups'])
+    _share_current_version(version)
+    return version
+
+
+def _store(version, df, rollups, derived):
+    # Callers hold _lock
+    _datasets[version] = {'df': df, 'rollups': rollups, 'derived': derived}
+    _datasets.move_to_end(version)
+    while len(_datasets) > MAX_VERSIONS:
+        oldest = next(iter(_datasets))
+        if oldest == _current_version:
+            _datasets.move_to_end(oldest)
+            oldest = next(iter(_datasets))
+        del _datasets[oldest]
+
+
+def _load_shared_dataset(version):
+    # A version published by another worker (e.g. after an upload there) is fetched from the shared cache
+    df = get_shared_cache().get_frame(f'dataset:{version}')
+    if df is None:
+        return False
+    rollups = _compute_rollups(df, version, None, None)
+    with _lock:
+        if version not in _datasets:
+            _store(version, df, rollups, {})
+    logging.info(f"Loaded dataset version {version} from the shared cache.")
+    return True
+
+
+def _get_entry(version):
+    with _lock:
+        entry = _datasets.get(version)
+        if entry is not None:
+            # Versions still in use stay; _store evicts the least recently used
+            _datasets.move_to_end(version)
+        return entry
+
+
+def get_dataset(version):
+    entry = _get_entry(version)
+    return None if entry is None else entry['df']
+
+
+def get_rollups(version):
+    entry = _get_entry(version)
+    return None if entry is None else entry['rollups']
+
+
+def get_resident_datasets():
+    # Snapshot of the versions held by this process, for the memory report
+    with _lock:
+        return [(version, dict(entry)) for version, entry in _datasets.items()]
+
+
+def get_current_version():
+    """The version new pages and uploads use: with a shared cache, the last one published by any worker."""
+    global _current_version
+    cache = get_shared_cache()
+    if cache.shared:
+        shared_version = cache.get_bytes('dataset:current')
+        if shared_version is not None:
+            shared_version = shared_version.decode('utf-8')
+            if shared_version != _current_version and (
+                    _get_entry(shared_version) is not None or _load_shared_dataset(shared_version)):
+                with _lock:
+                    _current_version = shared_version
+    return _current_version
+
+
+def make_handle(version):
+    # This is all that goes into dcc.Store(id='data-store')
+    return {'version': version}
+
+
+def resolve_version(data):
+    """Map a data-store handle to a loaded version.
+
+    A handle without a version stands for the current one. A version that is neither
+    loaded nor in the shared cache resolves to None rather than to some other dataset;
+    see is_expired.
+    """
+    version = data.get('version') if isinstance(data, dict) else None
+    if version is None:
+        return get_current_version()
+    if _get_entry(version) is None and not _load_shared_dataset(version):
+        logging.warning(f"Dataset version {version} is not available on this worker.")
+        return None
+    return version
+
+
+def is_expired(data):
+    # The handle names a version this worker can't serve, e.g. evicted or published by a worker without redis
+    return isinstance(data, dict) and data.get('version') is not None and resolve_version(data) is None
+
+
+def resolve_dataset(data):
+    """Turn the contents of the data-store into a DataFrame.
+
+    The returned frame is shared between callbacks and must not be modified in place.
+    """
+    if not data:
+        return None
+
+    # Older clients (and tests) may still send the records themselves
+    if isinstance(data, list):
+        df = ensure_compact(pd.DataFrame(data))
+    else:
+        df = get_dataset(resolve_version(data))
+    record_rows(df)
+    return df
+
+
+def resolve_rollups(data):
+    """Return the rollup tables for the data-store handle, building them for legacy record lists."""
+    if not data:
+        return None
+    if isinstance(data, list):
+        df = ensure_compact(pd.DataFrame(data))
+        return build_rollups(df) if is_compact(df) else None
+    return get_rollups(resolve_version(data))
+
+
+def resolve_derived(data, name, builder):
+    """Return ``builder(df)`` for the data-store handle, built at most once per dataset version."""
+    if not data:
+        return None
+    if isinstance(data, list):
+        return builder(ensure_compact(pd.DataFrame(data)))
+
+    entry = _get_entry(resolve_version(data))
+    if entry is None:
+        return None
+    derived = entry['derived']
+    if name not in derived:
+        derived[name] = builder(entry['df'])
+    return derived[name]
+
+
+def frame_derived(df, name, builder):
+    """Return ``builder(df)``, cached with the dataset version whose frame is ``df``.
+
+    For structures that are used by row position together with ``df``: they come
+    from ``df`` itself, never from whatever version a handle resolves to later.
+    Frames that aren't a loaded version (e.g. from legacy record lists) get a fresh build.
+    """
+    with _lock:
+        entry = next((entry for entry in _datasets.values() if entry['df'] is df), None)
+    if entry is None:
+        return builder(df)
+    derived = entry['derived']
+    if name not in derived:
+        derived[name] = builder(df)
+    return derived[name]
+
+
+def get_day_index(df):
+    # Day -> row offsets of ``df`` (a sorted frame from resolve_dataset), for slicing single days and ranges
+    return frame_derived(df, 'day_index', build_day_index)
+
+
+def resolve_figure(data, key, builder):
+    """Return ``builder()`` as a plotly figure dict, rendered once per dataset version across workers."""
+    if isinstance(data, list):
+        return json.loads(builder().to_json())
+    version = resolve_version(data)
+    if version is None:
+        return json.loads(builder().to_json())
+    return get_shared_cache().get_or_build_json(
+        f'figure:{version}:{key}', lambda: json.loads(builder().to_json())
+    )
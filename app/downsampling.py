@@ -0,0 +1,52 @@
+# app/downsampling.py
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """Largest-triangle-three-buckets: indices of at most ``threshold`` points that keep the shape of (x, y).
+
+    ``x`` must be sorted and ``x``/``y`` must not contain NaN.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    # The first and last points are always kept; the rest are split into equal buckets
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = 0
+    for i in range(threshold - 2):
+        bucket_start = int(i * bucket_size) + 1
+        bucket_end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third corner of the triangle
+        next_start = bucket_end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[selected] - avg_x) * (y[bucket_start:bucket_end] - y[selected])
+            - (x[selected] - x[bucket_start:bucket_end]) * (avg_y - y[selected])
+        )
+        selected = bucket_start + int(np.argmax(areas))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def downsample_series(x, y, threshold):
+    # Drops missing readings, then applies LTTB; returns the kept (x, y)
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    mask = ~np.isnan(y)
+    x, y = x[mask], y[mask]
+    x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    indices = lttb(x_numeric, y, threshold)
+    return x[indices], y[indices]
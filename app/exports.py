@@ -0,0 +1,123 @@
+# app/exports.py
+import csv
+import io
+import logging
+import tempfile
+from urllib.parse import quote
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import Response, abort, request, session, stream_with_context
+from openpyxl import Workbook
+from app.saved_collections import iter_saved_values
+
+EXPORT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Size of the pieces a finished export file is sent in
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Columns of the CSV and Parquet exports, one row per saved reading
+LONG_COLUMNS = ['Energy Type', 'Date', 'Time', 'Usage', 'Label', 'Saved At']
+
+
+def export_url(group_name, export_format='xlsx'):
+    return f"/export/{quote(group_name, safe='')}?format={export_format}"
+
+
+def _reading_rows(entry):
+    # Each saved value is {'Time': ..., <meter column>: usage}
+    for record in entry['values']:
+        usage = next((value for key, value in record.items() if key != 'Time'), None)
+        yield [entry['energy_type'], entry['date'], record.get('Time'), usage, entry.get('input', ''), entry['datetime']]
+
+
+def _stream_file(handle):
+    try:
+        handle.seek(0)
+        while True:
+            chunk = handle.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+
+def stream_csv(entries):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LONG_COLUMNS)
+    for entry in entries:
+        writer.writerows(_reading_rows(entry))
+        # One chunk per saved entry
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_xlsx(entries, handle):
+    # Write-only workbooks keep only the current row in memory; one sheet per energy type as before
+    workbook = Workbook(write_only=True)
+    sheets = {}
+    for entry in entries:
+        sheet = sheets.get(entry['energy_type'])
+        if sheet is None:
+            sheet = workbook.create_sheet(title=entry['energy_type'][:31])  # Excel sheet names are limited to 31 characters
+            meter_column = next((key for record in entry['values'] for key in record if key != 'Time'), 'Usage')
+            sheet.append(['Time', meter_column, 'Date', 'Label', 'Saved At'])
+            sheets[entry['energy_type']] = sheet
+        for row in _reading_rows(entry):
+            sheet.append([row[2], row[3], row[1], row[4], row[5]])
+    if not sheets:
+        workbook.create_sheet(title='Empty')
+    workbook.save(handle)
+
+
+def write_parquet(entries, handle):
+    schema = pa.schema([
+        ('Energy Type', pa.string()),
+        ('Date', pa.string()),
+        ('Time', pa.string()),
+        ('Usage', pa.float64()),
+        ('Label', pa.string()),
+        ('Saved At', pa.string())
+    ])
+    with pq.ParquetWriter(handle, schema) as writer:
+        for entry in entries:
+            columns = list(zip(*_reading_rows(entry))) or [[] for _ in LONG_COLUMNS]
+            writer.write_table(pa.Table.from_arrays([pa.array(column, type=field.type)
+                                                     for column, field in zip(columns, schema)], schema=schema))
+
+
+def register_export_routes(server):
+    @server.route('/export/<path:group_name>')
+    def export_group(group_name):
+        if not session.get('logged_in'):
+            abort(403)
+
+        export_format = request.args.get('format', 'xlsx')
+        if export_format not in EXPORT_FORMATS:
+            abort(400)
+
+        entries = iter_saved_values(group_name)
+        headers = {'Content-Disposition': f"attachment; filename*=UTF-8''{quote(group_name)}.{export_format}"}
+
+        if export_format == 'csv':
+            body = stream_csv(entries)
+        else:
+            # Workbooks and Parquet files are zip/footer based, so they are spooled to disk and then streamed
+            handle = tempfile.TemporaryFile()
+            try:
+                (write_xlsx if export_format == 'xlsx' else write_parquet)(entries, handle)
+            except Exception as e:
+                logging.error(f"Error exporting group {group_name}: {e}")
+                handle.close()
+                abort(500)
+            body = _stream_file(handle)
+
+        # No Content-Length, so the response is sent with chunked transfer encoding
+        return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format], headers=headers)
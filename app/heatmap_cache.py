@@ -0,0 +1,67 @@
+# app/heatmap_cache.py
+import numpy as np
+import pandas as pd
+from app.compact_schema import DAY, SLOT, day_labels, ensure_compact, meter_columns, parse_day, readings, slot_labels
+from app.dataset_registry import register_incremental_update, resolve_derived
+
+
+def build_heatmap_matrices(df):
+    """Dense (time slot x day) matrix per meter, with the day and slot numbers."""
+    df = ensure_compact(df)
+    meters = meter_columns(df)
+    day_codes, days = pd.factorize(df[DAY], sort=True)
+    slot_codes, slots = pd.factorize(df[SLOT], sort=True)
+
+    matrices = {}
+    for meter in meters:
+        matrix = np.full((len(slots), len(days)), np.nan)
+        matrix[slot_codes, day_codes] = readings(df[meter])
+        matrices[meter] = matrix
+    return {'days': np.asarray(days), 'slots': np.asarray(slots), 'matrices': matrices}
+
+
+def update_heatmap_matrices(heatmap, df_old, df_new, changed_days):
+    # New days after the last cached one are appended as columns; anything else is rebuilt
+    changed_days = sorted(changed_days)
+    days = heatmap['days']
+    df_new = ensure_compact(df_new)
+    if len(days) and changed_days and changed_days[0] > days[-1]:
+        part = build_heatmap_matrices(df_new[df_new[DAY].isin(changed_days)])
+        same_meters = part['matrices'].keys() == heatmap['matrices'].keys()
+        known_slots = set(part['slots']) <= set(heatmap['slots'])
+        if same_meters and known_slots:
+            slot_positions = np.searchsorted(heatmap['slots'], part['slots'])
+            matrices = {}
+            for meter, matrix in heatmap['matrices'].items():
+                new_columns = np.full((len(heatmap['slots']), len(part['days'])), np.nan)
+                new_columns[slot_positions, :] = part['matrices'][meter]
+                matrices[meter] = np.hstack([matrix, new_columns])
+            return {'days': np.concatenate([days, part['days']]), 'slots': heatmap['slots'], 'matrices': matrices}
+    return build_heatmap_matrices(df_new)
+
+
+def select_heatmap(heatmap, meter, selected_date):
+    """Return (z, x labels, y labels) for 'all', 'average' or a single date."""
+    matrix = heatmap['matrices'][meter]
+    slots = slot_labels(heatmap['slots']).tolist()
+    if selected_date == 'all':
+        return matrix, day_labels(heatmap['days']).tolist(), slots
+    if selected_date == 'average':
+        with np.errstate(invalid='ignore'):
+            counts = (~np.isnan(matrix)).sum(axis=1)
+            means = np.where(counts > 0, np.nansum(matrix, axis=1) / np.maximum(counts, 1), np.nan)
+        return means[:, np.newaxis], ['Average'], slots
+
+    day = parse_day(selected_date)
+    position = np.searchsorted(heatmap['days'], day)
+    if position == len(heatmap['days']) or heatmap['days'][position] != day:
+        return matrix[:, 0:0], [], slots
+    return matrix[:, position:position + 1], day_labels([day]).tolist(), slots
+
+
+def get_heatmap_matrices(data):
+    # Built once per dataset version, then carried forward by appending days on upload
+    return resolve_derived(data, 'heatmap', build_heatmap_matrices)
+
+
+register_incremental_update('heatmap', update_heatmap_matrices)
@@ -0,0 +1,156 @@
+# app/instrumentation.py
+import functools
+import os
+import random
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from dash.exceptions import PreventUpdate
+
+# Share of callback calls that are measured; 0 turns the instrumentation down to a random() per call
+CALLBACK_METRICS_SAMPLE_RATE = float(os.getenv('CALLBACK_METRICS_SAMPLE_RATE', '1.0'))
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROWS_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        # callback -> [count per bucket..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, callback, value):
+        with self._lock:
+            series = self._series.get(callback)
+            if series is None:
+                series = self._series[callback] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {callback: list(values) for callback, values in self._series.items()}
+        for callback, values in sorted(series.items()):
+            label = _escape(callback)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{callback="{label}",le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{callback="{label}",le="+Inf"}} {values[len(self.buckets)]}')
+            lines.append(f'{self.name}_count{{callback="{label}"}} {values[len(self.buckets)]}')
+            lines.append(f'{self.name}_sum{{callback="{label}"}} {values[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            label_text = ','.join(f'{name}="{_escape(label)}"' for name, label in zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{label_text}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+CALLBACK_SECONDS = Histogram('dash_callback_duration_seconds', "Wall time of sampled callback calls.", SECONDS_BUCKETS)
+REQUEST_BYTES = Histogram('dash_callback_request_bytes', "JSON body size of sampled callback requests.", BYTES_BUCKETS)
+RESPONSE_BYTES = Histogram('dash_callback_response_bytes', "JSON body size of sampled callback responses.", BYTES_BUCKETS)
+DATAFRAME_ROWS = Histogram('dash_callback_dataframe_rows', "Rows of the datasets resolved by sampled callback calls.", ROWS_BUCKETS)
+CALLBACK_EXCEPTIONS = Counter('dash_callback_exceptions_total', "Exceptions raised by callbacks (all calls, not only sampled ones).", ('callback', 'exception'))
+
+METRICS = [CALLBACK_SECONDS, REQUEST_BYTES, RESPONSE_BYTES, DATAFRAME_ROWS, CALLBACK_EXCEPTIONS]
+
+
+def instrumented(func, sample_rate=None):
+    """Wrap a callback so that a sample of its calls is timed and sized."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        rate = CALLBACK_METRICS_SAMPLE_RATE if sample_rate is None else sample_rate
+        sampled = rate >= 1 or (rate > 0 and random.random() < rate)
+        if sampled and has_request_context():
+            # Read back by record_rows and the after_request hook
+            g.metrics_callback = name
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            CALLBACK_EXCEPTIONS.inc(name, type(e).__name__)
+            raise
+        finally:
+            if sampled:
+                CALLBACK_SECONDS.observe(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+def instrument_callbacks(app):
+    """Instrument every callback registered on ``app`` from now on; call it before any @app.callback."""
+    register = app.callback
+
+    @functools.wraps(register)
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+        return lambda func: decorator(instrumented(func))
+
+    app.callback = callback
+
+
+def record_rows(df):
+    # Called wherever a callback resolves a dataset; a no-op outside sampled callback calls
+    if df is not None and has_request_context() and 'metrics_callback' in g:
+        DATAFRAME_ROWS.observe(g.metrics_callback, len(df))
+
+
+def render_metrics():
+    lines = [
+        "# HELP dash_callback_sample_rate Share of callback calls that are measured.",
+        "# TYPE dash_callback_sample_rate gauge",
+        f"dash_callback_sample_rate {CALLBACK_METRICS_SAMPLE_RATE}"
+    ]
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def register_metrics_routes(server):
+    @server.after_request
+    def record_payload_sizes(response):
+        name = g.get('metrics_callback')
+        if name is not None:
+            REQUEST_BYTES.observe(name, request.content_length or 0)
+            # Dash responses are plain JSON strings, so the length is known without reading a stream
+            if not response.is_streamed:
+                RESPONSE_BYTES.observe(name, response.calculate_content_length() or 0)
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        # Each gunicorn worker reports its own calls
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -82,6 +82,9 @@ def get_dashboard_layout(data):
             ), width={"size": 6, "offset": 3}, className='mb-4 text-center')
         ]),
         html.Div(id='upload-message', className='text-success mt-3'),
+        # Uploads are processed in the background; the interval polls their progress while one is running
+        dcc.Store(id='upload-job-store'),
+        dcc.Interval(id='upload-progress-interval', interval=1000, disabled=True),
         dbc.Row([
             dbc.Col(
                 get_navigation_bar('/dashboard'),  # Add navigation bar
@@ -2,22 +2,11 @@ import dash_bootstrap_components as dbc
 from dash import html, dcc, dash_table
 from app.config import energy_meter_options
 from app.layouts.navigation_bar import get_navigation_bar
-from app.models import SavedCollection
 
 def get_save_data_collection_layout(data, app):
-    with app.server.app_context():  # Ensure the query runs within an app context
-        all_rows = SavedCollection.query.order_by(SavedCollection.datetime).all()
-        store_data = [{
-            'group_name': row.group_name,
-            'energy_type': row.energy_type,
-            'date': row.date,
-            'input': row.input,
-            'datetime': row.datetime,
-            'values': row.values
-        } for row in all_rows]
-
+    # Saved entries are loaded a page at a time by a callback, without their values
     save_data_collection_layout = dbc.Container(fluid=True, children=[
-        dcc.Store(id='saved-data-store', data=store_data),
+        dcc.Store(id='saved-data-store', data=[]),
         html.H2("Save and Collect Data", className="text-center my-4"),
         dbc.Row([
             dbc.Col([
@@ -71,9 +60,20 @@ def get_save_data_collection_layout(data, app):
                             placeholder="Select a group or ungrouped data",
                             className="mb-3"
                         ),
+                        dcc.RadioItems(
+                            id='export-format-radio',
+                            options=[
+                                {'label': 'Excel', 'value': 'xlsx'},
+                                {'label': 'CSV', 'value': 'csv'},
+                                {'label': 'Parquet', 'value': 'parquet'}
+                            ],
+                            value='xlsx',
+                            labelStyle={'display': 'inline-block', 'marginRight': '10px'},
+                            className="mb-3"
+                        ),
+                        # Links to the streaming export route; the href is set once a group is selected
                         dbc.Button("Download Selected Group", id="download-button", color="success",
-                                   className="w-100 mb-3"),
-                        dcc.Download(id="download-component"),
+                                   className="w-100 mb-3", external_link=True, disabled=True),
                         html.H5("Group Summary", className="mt-4"),
                         html.Div(id="group-summary", className="mt-3 text-muted"),
                         html.H5("Saved Summary Stats", className="mt-4"),
@@ -110,6 +110,14 @@ def get_save_data_collection_layout(data, app):
                                 }
                             ],
                             style_table={'overflowX': 'auto'},
+                        ),
+                        dbc.Pagination(
+                            id='saved-data-pagination',
+                            max_value=1,
+                            active_page=1,
+                            fully_expanded=False,
+                            previous_next=True,
+                            class_name='mt-3'
                         )
 
                     ])
@@ -117,7 +125,6 @@ def get_save_data_collection_layout(data, app):
             ], width=4),
         ]),
 
-        dcc.Store(id='saved-data-store', data=[]),
         html.H4("Preview Section", className="text-muted mt-4"),
         html.P(
             "This section allows you to preview the data based on your current selections for date and energy type. "
@@ -1,5 +1,3 @@
-import logging
-logging.basicConfig(level=logging.DEBUG)
 from dash import no_update
 
 def register_login_callbacks(app, get_dashboard_layout, data):
@@ -0,0 +1,193 @@
+# app/memory_profile.py
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+import numpy as np
+import pandas as pd
+import plotly
+from flask import abort, jsonify, request, session
+from app.dataset_registry import get_current_version, get_resident_datasets
+from app.shared_cache import InProcessCache, get_shared_cache
+
+# Opt-in: tracing every allocation slows the app down noticeably, and each worker then runs its
+# callbacks one at a time (see _snapshot_lock), so concurrent requests queue behind each other
+MEMORY_PROFILING = os.getenv('MEMORY_PROFILING', 'false').lower() in ('1', 'true', 'yes')
+# Stack depth kept per allocation; 1 is enough to name the allocating line
+MEMORY_PROFILE_FRAMES = int(os.getenv('MEMORY_PROFILE_FRAMES', '1'))
+MEMORY_PROFILE_TOP = int(os.getenv('MEMORY_PROFILE_TOP', '15'))
+
+# Allocations made by the profiler and the import system are left out of the reports
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+]
+
+# callback -> {'calls', 'last_peak_bytes', 'last_net_bytes', 'max_peak_bytes', 'top_sites'}
+_callback_profiles = {}
+_profiles_lock = threading.Lock()
+# tracemalloc is process-wide, so profiled callbacks run one at a time to keep their snapshots apart
+_snapshot_lock = threading.Lock()
+
+
+def deep_size(obj, seen=None):
+    """Bytes held by ``obj`` and everything it references, counting DataFrames with their object columns."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += sum(deep_size(item, seen) for item in obj.ravel())
+        return size
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def _allocation_sites(stats, top):
+    sites = []
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        sites.append({
+            'site': f"{frame.filename}:{frame.lineno}",
+            'size_bytes': stat.size,
+            'count': stat.count,
+            # Only set when comparing two snapshots
+            'size_diff_bytes': getattr(stat, 'size_diff', None),
+            'count_diff': getattr(stat, 'count_diff', None)
+        })
+    return sites
+
+
+def _record_call(name, peak_bytes, net_bytes, diff):
+    with _profiles_lock:
+        profile = _callback_profiles.setdefault(name, {'calls': 0, 'max_peak_bytes': 0, 'top_sites': []})
+        profile['calls'] += 1
+        profile['last_peak_bytes'] = peak_bytes
+        profile['last_net_bytes'] = net_bytes
+        # The allocation sites are kept for the heaviest call seen so far
+        if peak_bytes >= profile['max_peak_bytes']:
+            profile['max_peak_bytes'] = peak_bytes
+            profile['top_sites'] = _allocation_sites([stat for stat in diff if stat.size_diff > 0], MEMORY_PROFILE_TOP)
+
+
+def profiled(func):
+    """Wrap a callback so each call is bracketed by tracemalloc snapshots."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not tracemalloc.is_tracing():
+            return func(*args, **kwargs)
+        with _snapshot_lock:
+            before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            try:
+                return func(*args, **kwargs)
+            finally:
+                current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+                _record_call(name, peak_bytes - start_bytes, current_bytes - start_bytes,
+                             after.compare_to(before, 'lineno'))
+
+    return wrapper
+
+
+def profile_callbacks(app):
+    """Start tracemalloc and profile every callback registered on ``app`` from now on."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_PROFILE_FRAMES)
+    register = app.callback
+
+    @functools.wraps(register)
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+        return lambda func: decorator(profiled(func))
+
+    app.callback = callback
+
+
+def _process_memory():
+    usage = {'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}  # ru_maxrss is in KiB on Linux
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    usage['rss_bytes'] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if tracemalloc.is_tracing():
+        usage['traced_bytes'], usage['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+    return usage
+
+
+def dataset_memory_report():
+    """Deep size of each dataset version held by this process, with its rollups and derived structures."""
+    current = get_current_version()
+    report = []
+    for version, entry in get_resident_datasets():
+        df = entry['df']
+        report.append({
+            'version': version,
+            'current': version == current,
+            'rows': len(df),
+            'columns': len(df.columns),
+            'dataframe_bytes': deep_size(df),
+            'rollups_bytes': deep_size(entry['rollups']),
+            'derived_bytes': {name: deep_size(value) for name, value in entry['derived'].items()}
+        })
+    return report
+
+
+def cache_memory_report():
+    report = {}
+    client = get_shared_cache().client
+    if isinstance(client, InProcessCache):
+        report['shared_cache_entries'], report['shared_cache_bytes'] = client.memory_usage()
+    else:
+        # Kept in redis, outside this process
+        report['shared_cache'] = type(client).__name__
+    return report
+
+
+def memory_report(app=None, top=MEMORY_PROFILE_TOP):
+    report = {
+        'process': _process_memory(),
+        'datasets': dataset_memory_report(),
+        'caches': cache_memory_report()
+    }
+    if app is not None and app.validation_layout is not None:
+        report['validation_layout_json_bytes'] = len(json.dumps(app.validation_layout, cls=plotly.utils.PlotlyJSONEncoder))
+    with _profiles_lock:
+        report['callbacks'] = json.loads(json.dumps(_callback_profiles))
+    if tracemalloc.is_tracing():
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        report['top_allocations'] = _allocation_sites(snapshot.statistics('lineno'), top)
+    return report
+
+
+def register_memory_routes(server, app=None):
+    @server.route('/admin/memory')
+    def memory():
+        if not MEMORY_PROFILING:
+            abort(404)
+        if not session.get('logged_in'):
+            abort(403)
+        return jsonify(memory_report(app, top=request.args.get('top', MEMORY_PROFILE_TOP, type=int)))
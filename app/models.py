@@ -7,6 +7,11 @@ class User(db.Model):
     password_hash = db.Column(db.String(512), nullable=False)
 
 class SavedCollection(db.Model):
+    __table_args__ = (
+        # One entry per meter and day within a group; saves skip entries that already exist
+        db.Index('ix_saved_collection_group_energy_type_date', 'group_name', 'energy_type', 'date', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     group_name = db.Column(db.String(255), nullable=False)
     energy_type = db.Column(db.String(255), nullable=False)
@@ -15,9 +20,16 @@ class SavedCollection(db.Model):
     datetime = db.Column(db.String(255), nullable=False)
     values = db.Column(db.JSON, nullable=False)  # Store the data as JSON
 
+# Meter readings in long format, one row per (energy type, date, time slot)
 class UploadedData(db.Model):
+    __table_args__ = (
+        # Serves range/meter queries and lets bulk inserts replace readings that are already stored
+        db.Index('ix_uploaded_data_energy_type_date_time', 'energy_type', 'date', 'time', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
-    time = db.Column(db.Time, nullable=True)
+    # 'HH:MM:SS' as in the meter exports, whose last slot of the day is 24:00:00
+    time = db.Column(db.String(8), nullable=True)
     energy_type = db.Column(db.String(255), nullable=False)
-    usage = db.Column(db.Float, nullable=False)
\ No newline at end of file
+    usage = db.Column(db.Float, nullable=False)
@@ -0,0 +1,57 @@
+# app/rollups.py
+import pandas as pd
+from app.compact_schema import DAY, SLOT, ensure_compact, meter_columns, readings
+
+
+def _daily_max_times(df, values, meters):
+    # Slot of the first maximum reading of each day, per meter
+    max_times = {}
+    for meter in meters:
+        meter_readings = pd.DataFrame({DAY: df[DAY], SLOT: df[SLOT], meter: values[meter]}).dropna(subset=[meter])
+        meter_readings = meter_readings.sort_values(by=meter, ascending=False, kind='stable')
+        max_times[meter] = meter_readings.drop_duplicates(subset=DAY).set_index(DAY)[SLOT]
+    return pd.DataFrame(max_times, columns=meters)
+
+
+def build_rollups(df):
+    """Aggregate the half-hourly rows into small per-day and per-slot tables, indexed by day and slot number."""
+    df = ensure_compact(df)
+    meters = meter_columns(df)
+    # Summed as float64 so the totals match the rounded readings
+    values = pd.DataFrame({meter: readings(df[meter]) for meter in meters}, index=df.index, columns=meters)
+    by_date = values.groupby(df[DAY])
+    by_time = values.groupby(df[SLOT])
+    daily_totals = by_date.sum()
+    return {
+        'daily_totals': daily_totals,
+        'daily_max': by_date.max(),
+        'daily_max_time': _daily_max_times(df, values, meters).reindex(daily_totals.index),
+        'time_sums': by_time.sum(),
+        'time_counts': by_time.count()
+    }
+
+
+def update_rollups(rollups, df_old, df_new, days):
+    """Refresh ``rollups`` after the rows for ``days`` (day numbers) changed from ``df_old`` to ``df_new``."""
+    days = set(days)
+    df_old, df_new = ensure_compact(df_old), ensure_compact(df_new)
+    old_part = build_rollups(df_old[df_old[DAY].isin(days)])
+    new_part = build_rollups(df_new[df_new[DAY].isin(days)])
+    meters = meter_columns(df_new)
+
+    updated = {}
+    for name in ('daily_totals', 'daily_max', 'daily_max_time'):
+        kept = rollups[name].drop(index=list(days), errors='ignore')
+        updated[name] = pd.concat([kept, new_part[name]]).sort_index().reindex(columns=meters)
+
+    # Time-of-day sums and counts are additive: take the old rows for these days out, put the new ones in
+    for name in ('time_sums', 'time_counts'):
+        table = rollups[name].sub(old_part[name], fill_value=0).add(new_part[name], fill_value=0)
+        updated[name] = table.reindex(columns=meters).sort_index()
+    updated['time_counts'] = updated['time_counts'].fillna(0).astype(int)
+    return updated
+
+
+def time_of_day_means(rollups):
+    counts = rollups['time_counts']
+    return rollups['time_sums'].where(counts > 0) / counts.where(counts > 0)
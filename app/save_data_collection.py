@@ -1,177 +1,153 @@
 # app/save_data_collection_layout.py
 from datetime import datetime
-from io import BytesIO
+from itertools import groupby
 import pandas as pd
 import logging
-from dash import Input, Output, State, html, dash_table, dcc
+from dash import Input, Output, State, html, dash_table, dcc, no_update
+from app.compact_schema import day_dates, meter_columns, parse_day, slice_days, to_labels
 from app.config import energy_type_mapping
+from app.dataset_registry import get_day_index, resolve_dataset
+from app.exports import export_url
+from app.saved_collections import (
+    get_saved_group_counts, get_saved_page, get_saved_summary, save_entries
+)
+from app.usage_store import query_usage
+
+def get_day_readings(data, selected_date, energy_types):
+    # One day of readings is filtered in SQL; the in-memory frame covers anything not stored yet
+    try:
+        day = parse_day(selected_date)
+    except (ValueError, TypeError):
+        day = None
+
+    if day is not None:
+        try:
+            day_date = day_dates([day])[0]
+            day_df = query_usage(day_date, day_date, energy_types)
+            if not day_df.empty:
+                return day_df
+        except Exception as e:
+            logging.error(f"Error querying readings for {selected_date}: {e}")
+
+    df = resolve_dataset(data)
+    if day is None:
+        return to_labels(df.iloc[0:0])
+    return to_labels(slice_days(df, get_day_index(df), day, day))
+
+def readings_to_records(df):
+    # Missing readings become null, which every JSON column accepts
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def build_grouped_table(saved_data):
+    # Entries arrive ordered by group, so each group is one consecutive run
+    table_data = []
+    for group, entries in groupby(saved_data, key=lambda entry: entry['group_name']):
+        table_data.append({
+            'group_name': f"--- {group} ---",
+            'energy_type': '',
+            'date': '',
+            'input': '',
+            'datetime': '',
+            'summary': ''
+        })
+        for entry in entries:
+            table_data.append({
+                'group_name': '',
+                'energy_type': entry['energy_type'],
+                'date': entry['date'],
+                'input': entry.get('input', ''),
+                'datetime': entry['datetime'],
+                'summary': f"{entry['record_count']} records saved"
+            })
+    return table_data
 
 def register_save_data_callbacks(app):
+    @app.callback(
+        [Output('saved-data-store', 'data', allow_duplicate=True),
+         Output('saved-data-table', 'data', allow_duplicate=True),
+         Output('saved-data-pagination', 'max_value')],
+        [Input('saved-data-pagination', 'active_page')],
+        prevent_initial_call='initial_duplicate'
+    )
+    def load_saved_page(active_page):
+        # Only one page of metadata is sent to the browser
+        try:
+            entries, page_count = get_saved_page((active_page or 1) - 1)
+        except Exception as e:
+            logging.error(f"Error loading saved collections: {e}")
+            entries, page_count = [], 1
+        return entries, build_grouped_table(entries), page_count
+
     @app.callback(
         [Output('saved-data-store', 'data'),
          Output('save-data-message', 'children'),
-         Output('saved-data-table', 'data')],
+         Output('saved-data-table', 'data'),
+         Output('saved-data-pagination', 'max_value', allow_duplicate=True)],
         [Input('save-data-button', 'n_clicks')],
         [State('data-store', 'data'),
          State('energy-type-dropdown', 'value'),
          State('date-dropdown', 'value'),
          State('data-input', 'value'),
          State('group-name-input', 'value'),
-         State('saved-data-store', 'data')]
+         State('saved-data-pagination', 'active_page')],
+        prevent_initial_call=True
     )
-    def save_data(n_clicks, data, selected_energy_types, selected_date, user_input, group_name, saved_data):
-        if saved_data is None:
-            saved_data = []
-
+    def save_data(n_clicks, data, selected_energy_types, selected_date, user_input, group_name, active_page):
         if not selected_energy_types or not selected_date:
-            return saved_data, "Please select energy type(s) and date.", saved_data
-
-        if n_clicks > 0:
-            if not data:
-                return saved_data, "No data available to save.", saved_data
-
-            try:
-                if isinstance(selected_energy_types, str):
-                    selected_energy_types = [selected_energy_types]
-                # Handle "all" selection
-                if "all" in selected_energy_types:
-                    selected_energy_types = [col for col in data[0].keys() if col not in ['Date', 'Time']]
-
-                for energy_type in selected_energy_types:
-                    mapped_energy_type = energy_type_mapping.get(energy_type, energy_type)
-
-                    # Check if this exact data already exists
-                    duplicate_entry = next((
-                        entry for entry in saved_data
-                        if entry['energy_type'] == mapped_energy_type and
-                           entry['date'] == selected_date and
-                           entry['group_name'] == (group_name or "Ungrouped")
-                    ), None)
-
-                    if duplicate_entry:
-                        # Prepare grouped table to show existing data message
-                        from collections import defaultdict
-                        grouped_entries = defaultdict(list)
-                        for entry in saved_data:
-                            grouped_entries[entry['group_name']].append(entry)
-
-                        table_data = []
-                        for group, entries in grouped_entries.items():
-                            table_data.append({
-                                'group_name': f"--- {group} ---",
-                                'energy_type': '',
-                                'date': '',
-                                'input': '',
-                                'datetime': '',
-                                'summary': ''
-                            })
-                            for entry in entries:
-                                table_data.append({
-                                    'group_name': '',
-                                    'energy_type': entry['energy_type'],
-                                    'date': entry['date'],
-                                    'input': entry.get('input', ''),
-                                    'datetime': entry['datetime'],
-                                    'summary': f"{len(entry['values'])} records saved"
-                                })
-
-                        return saved_data, html.Span("This data already exists in the collection.",
-                                                     style={"color": "red"}), table_data
-
-                    # No duplicate, save new data
-                    df = pd.DataFrame(data)
-                    filtered_df = df[df['Date'] == selected_date][['Time', energy_type]]
-
-                    new_data = {
-                        'energy_type': mapped_energy_type,
-                        'date': selected_date,
-                        'input': user_input or "N/A",
-                        'group_name': group_name or "Ungrouped",
-                        'values': filtered_df.to_dict('records'),
-                        'datetime': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    saved_data.append(new_data)
-
-                # Prepare grouped table after saving all new entries
-                from collections import defaultdict
-                grouped_entries = defaultdict(list)
-                for entry in saved_data:
-                    grouped_entries[entry['group_name']].append(entry)
-
-                table_data = []
-                for group, entries in grouped_entries.items():
-                    table_data.append({
-                        'group_name': f"--- {group} ---",
-                        'energy_type': '',
-                        'date': '',
-                        'input': '',
-                        'datetime': '',
-                        'summary': ''
-                    })
-                    for entry in entries:
-                        table_data.append({
-                            'group_name': '',
-                            'energy_type': entry['energy_type'],
-                            'date': entry['date'],
-                            'input': entry.get('input', ''),
-                            'datetime': entry['datetime'],
-                            'summary': f"{len(entry['values'])} records saved"
-                        })
-
-                return saved_data, "Data saved successfully!", table_data
-
-            except Exception as e:
-                logging.error(f"Error processing data: {e}")
-                return saved_data, "An error occurred while saving data.", saved_data
-
-        return saved_data, "", saved_data
+            return no_update, "Please select energy type(s) and date.", no_update, no_update
 
-    @app.callback(
-        Output("download-component", "data"),
-        [Input("download-button", "n_clicks")],
-        [State("group-selection-dropdown", "value"),
-         State("saved-data-store", "data")],
-        prevent_initial_call=True
-    )
-    def download_data(n_clicks, selected_group, saved_data):
-        if not saved_data or not selected_group:
-            return None
+        if not n_clicks:
+            return no_update, "", no_update, no_update
+
+        if not data:
+            return no_update, "No data available to save.", no_update, no_update
 
         try:
-            # Filter data by selected group
-            filtered_data = [entry for entry in saved_data if entry['group_name'] == selected_group]
-
-            if not filtered_data:
-                return None
-
-            # Create a DataFrame for each energy type
-            energy_type_dfs = {}
-            for entry in filtered_data:
-                if isinstance(entry['values'], list):
-                    df = pd.DataFrame(entry['values'])
-                    df['Date'] = entry['date']
-                    df['Label'] = entry.get('input', '')
-                    df['Saved At'] = entry['datetime']
-                    energy_type = entry['energy_type']
-                    if energy_type not in energy_type_dfs:
-                        energy_type_dfs[energy_type] = []
-                    energy_type_dfs[energy_type].append(df)
-
-            # Combine data for each energy type into separate sheets
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                for energy_type, dfs in energy_type_dfs.items():
-                    combined_df = pd.concat(dfs, ignore_index=True)
-                    sheet_name = energy_type[:31]  # Excel sheet names are limited to 31 characters
-                    combined_df.to_excel(writer, sheet_name=sheet_name, index=False)
-            buffer.seek(0)
-
-            filename = f"{selected_group}.xlsx"
-            return dcc.send_bytes(buffer.getvalue(), filename)
+            if isinstance(selected_energy_types, str):
+                selected_energy_types = [selected_energy_types]
+            # Handle "all" selection
+            if "all" in selected_energy_types:
+                df = resolve_dataset(data)
+                selected_energy_types = meter_columns(df)
+
+            day_df = get_day_readings(data, selected_date, selected_energy_types)
+            saved_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            entries = [{
+                'group_name': group_name or "Ungrouped",
+                'energy_type': energy_type_mapping.get(energy_type, energy_type),
+                'date': selected_date,
+                'input': user_input or "N/A",
+                'datetime': saved_at,
+                'values': readings_to_records(day_df[['Time', energy_type]])
+            } for energy_type in selected_energy_types]
+
+            # The unique index on (group, energy type, date) skips anything already saved
+            inserted = save_entries(entries)
+            if inserted == 0:
+                message = html.Span("This data already exists in the collection.", style={"color": "red"})
+            elif inserted < len(entries):
+                message = f"Data saved successfully! {len(entries) - inserted} entries already in the collection were skipped."
+            else:
+                message = "Data saved successfully!"
+
+            page, page_count = get_saved_page((active_page or 1) - 1)
+            return page, message, build_grouped_table(page), page_count
 
         except Exception as e:
-            logging.error(f"Error generating download data: {e}")
-            return None
+            logging.error(f"Error processing data: {e}")
+            return no_update, "An error occurred while saving data.", no_update, no_update
+
+    @app.callback(
+        [Output("download-button", "href"),
+         Output("download-button", "disabled")],
+        [Input("group-selection-dropdown", "value"),
+         Input("export-format-radio", "value")]
+    )
+    def update_download_link(selected_group, export_format):
+        # The file itself is streamed by the /export route rather than sent through a callback
+        if not selected_group:
+            return None, True
+        return export_url(selected_group, export_format or 'xlsx'), False
 
     # Update the summary stats callback
     def update_saved_summary_stats(saved_data):
@@ -200,13 +176,11 @@ def register_save_data_callbacks(app):
         Input("saved-data-store", "data")
     )
     def update_saved_summary_stats(saved_data):
-        if not saved_data:
-            return "No data saved yet."
-
         try:
-            total_entries = len(saved_data)
-            energy_type_counts = pd.DataFrame(saved_data)['energy_type'].value_counts().to_dict()
-            most_recent_date = max(entry['datetime'] for entry in saved_data)
+            # Counted in the database rather than from the page of entries in the browser
+            total_entries, energy_type_counts, most_recent_date = get_saved_summary()
+            if not total_entries:
+                return "No data saved yet."
 
             stats = [
                 f"Total Entries: {total_entries}",
@@ -234,19 +208,16 @@ def register_save_data_callbacks(app):
         [Input("saved-data-store", "data")]
     )
     def update_group_options(saved_data):
-        if not saved_data:
-            return [], "No data saved yet."
-
         try:
-            # Get unique group names
-            group_names = {entry['group_name'] for entry in saved_data}
-            options = [{'label': group, 'value': group} for group in group_names]
+            # Groups on other pages must still be downloadable, so they come from the database
+            group_counts = get_saved_group_counts()
+            if not group_counts:
+                return [], "No data saved yet."
+
+            options = [{'label': group, 'value': group} for group in group_counts]
 
             # Generate group summary
-            summary = []
-            for group in group_names:
-                count = sum(1 for entry in saved_data if entry['group_name'] == group)
-                summary.append(f"{group}: {count} entries")
+            summary = [f"{group}: {count} entries" for group, count in group_counts.items()]
 
             return options, html.Ul([html.Li(item) for item in summary])
 
@@ -0,0 +1,98 @@
+# app/saved_collections.py
+import math
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import db
+from app.models import SavedCollection
+
+# Saved entries listed per page on the save-data page
+SAVED_PAGE_SIZE = 100
+
+
+def _metadata_columns():
+    # Everything but the values themselves, which are only read for downloads
+    return [
+        SavedCollection.id,
+        SavedCollection.group_name,
+        SavedCollection.energy_type,
+        SavedCollection.date,
+        SavedCollection.input,
+        SavedCollection.datetime,
+        func.json_array_length(SavedCollection.values).label('record_count')
+    ]
+
+
+def get_saved_page(page=0, page_size=SAVED_PAGE_SIZE):
+    """Metadata of one page of saved entries, by group and then oldest first; returns (entries, page_count)."""
+    total = db.session.query(func.count(SavedCollection.id)).scalar()
+    rows = (
+        db.session.query(*_metadata_columns())
+        .order_by(SavedCollection.group_name, SavedCollection.datetime, SavedCollection.id)
+        .offset(page * page_size)
+        .limit(page_size)
+        .all()
+    )
+    return [dict(row._mapping) for row in rows], max(1, math.ceil(total / page_size))
+
+
+def get_saved_group_counts():
+    rows = (
+        db.session.query(SavedCollection.group_name, func.count(SavedCollection.id))
+        .group_by(SavedCollection.group_name)
+        .all()
+    )
+    return dict(rows)
+
+
+def get_saved_summary():
+    """(total entries, entries per energy type, most recent save) over every saved entry."""
+    energy_type_counts = dict(
+        db.session.query(SavedCollection.energy_type, func.count(SavedCollection.id))
+        .group_by(SavedCollection.energy_type)
+        .all()
+    )
+    most_recent = db.session.query(func.max(SavedCollection.datetime)).scalar()
+    return sum(energy_type_counts.values()), energy_type_counts, most_recent
+
+
+def iter_saved_values(group_name, batch_size=50):
+    """Yield the entries of one group, values included, without loading the whole group at once."""
+    rows = (
+        SavedCollection.query
+        .filter_by(group_name=group_name)
+        .order_by(SavedCollection.energy_type, SavedCollection.datetime, SavedCollection.id)
+        .yield_per(batch_size)
+    )
+    for row in rows:
+        yield {
+            'group_name': row.group_name,
+            'energy_type': row.energy_type,
+            'date': row.date,
+            'input': row.input,
+            'datetime': row.datetime,
+            'values': row.values
+        }
+
+
+def save_entries(entries):
+    """Insert ``entries`` in one statement, skipping any (group, energy type, date) that is already saved.
+
+    Returns the number of entries inserted.
+    """
+    if not entries:
+        return 0
+    # The app runs on SQLite locally and PostgreSQL when DATABASE_URL is set
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    statement = (
+        dialect.insert(SavedCollection.__table__)
+        .values(entries)
+        .on_conflict_do_nothing(index_elements=['group_name', 'energy_type', 'date'])
+        .returning(SavedCollection.id)
+    )
+    try:
+        inserted = len(db.session.execute(statement).all())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return inserted
@@ -0,0 +1,173 @@
+# app/shared_cache.py
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+# Set REDIS_URL (e.g. redis://localhost:6379/0) to share processed data between gunicorn workers
+REDIS_URL = os.getenv('REDIS_URL')
+CACHE_NAMESPACE = os.getenv('SHARED_CACHE_NAMESPACE', 'energy-dashboard')
+DATASET_TTL = int(os.getenv('SHARED_CACHE_DATASET_TTL', str(24 * 60 * 60)))
+FIGURE_TTL = int(os.getenv('SHARED_CACHE_FIGURE_TTL', str(60 * 60)))
+# Size limit of the in-process fallback; the least recently used entries are dropped beyond it
+IN_PROCESS_CACHE_MAX_BYTES = int(os.getenv('SHARED_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+
+class InProcessCache:
+    """Dict-backed stand-in for the subset of the redis client used here, bounded to ``max_bytes``."""
+
+    def __init__(self, max_bytes=IN_PROCESS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _pop(self, key):
+        # Callers hold _lock
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+        return entry
+
+    def _evict(self):
+        # Callers hold _lock; expired entries go first, then the least recently used
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._data.items() if expires_at < now]:
+            self._pop(key)
+        while self._bytes > self.max_bytes:
+            self._pop(next(iter(self._data)))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def setex(self, key, ttl, value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._bytes += len(value)
+            self._evict()
+
+    def exists(self, key):
+        return int(self.get(key) is not None)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._pop(key) is not None for key in keys)
+
+    def memory_usage(self):
+        # (entries, bytes of the stored values)
+        with self._lock:
+            return len(self._data), self._bytes
+
+
+class SharedCache:
+    """Versioned cache for frames and figure JSON, backed by redis or an in-process dict.
+
+    ``shared`` tells whether other workers can read the entries; it defaults to
+    False for an InProcessCache, which tests can override to stand in for redis.
+    """
+
+    def __init__(self, client, namespace=CACHE_NAMESPACE, shared=None):
+        self.client = client
+        self.namespace = namespace
+        self.shared = not isinstance(client, InProcessCache) if shared is None else shared
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get_bytes(self, key):
+        try:
+            return self.client.get(self._key(key))
+        except Exception as e:
+            logging.error(f"Error reading {key} from the shared cache: {e}")
+            return None
+
+    def set_bytes(self, key, value, ttl):
+        try:
+            self.client.setex(self._key(key), ttl, value)
+        except Exception as e:
+            logging.error(f"Error writing {key} to the shared cache: {e}")
+
+    def exists(self, key):
+        try:
+            return bool(self.client.exists(self._key(key)))
+        except Exception as e:
+            logging.error(f"Error checking {key} in the shared cache: {e}")
+            return False
+
+    def get_frame(self, key):
+        value = self.get_bytes(key)
+        if value is None:
+            return None
+        return pd.read_parquet(io.BytesIO(value))
+
+    def set_frame(self, key, df, ttl=DATASET_TTL):
+        buffer = io.BytesIO()
+        try:
+            # Parquet needs string column names and drops the index unless told otherwise
+            df.to_parquet(buffer, index=not isinstance(df.index, pd.RangeIndex))
+        except Exception as e:
+            logging.error(f"Error serialising {key} for the shared cache: {e}")
+            return
+        self.set_bytes(key, buffer.getvalue(), ttl)
+
+    def get_json(self, key):
+        value = self.get_bytes(key)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key, value, ttl=FIGURE_TTL):
+        self.set_bytes(key, json.dumps(value).encode('utf-8'), ttl)
+
+    def get_or_build_json(self, key, builder, ttl=FIGURE_TTL):
+        value = self.get_json(key)
+        if value is None:
+            value = builder()
+            self.set_json(key, value, ttl)
+        return value
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def _create_client():
+    if REDIS_URL:
+        try:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL)
+            client.ping()
+            logging.info(f"Using redis at {REDIS_URL} for the shared cache.")
+            return client
+        except Exception as e:
+            logging.error(f"Could not connect to redis at {REDIS_URL}, using an in-process cache instead: {e}")
+    return InProcessCache()
+
+
+def get_shared_cache():
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedCache(_create_client())
+        return _shared_cache
+
+
+def set_shared_cache(cache):
+    # Lets tests and scripts swap in another backend, e.g. SharedCache(InProcessCache())
+    global _shared_cache
+    with _shared_cache_lock:
+        _shared_cache = cache
@@ -1,13 +1,116 @@
+from collections import namedtuple
 from dash import html, dcc
 from dash.dependencies import Input, Output, State
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from app.compact_schema import DAY, SLOT, day_label, ensure_compact, meter_columns, readings, slot_label, slot_labels
 from app.data_processing import get_processed_data
+from app.dataset_registry import resolve_dataset, resolve_derived, resolve_rollups
 from app.config import energy_meter_options
+from app.warmup import is_ready, loading_message
 
 # Create a mapping from value to label
 value_to_label = {option['value']: option['label'] for option in energy_meter_options}
 
+# Plain-data result for one meter; days and times are day and slot numbers until rendered
+MeterStatistics = namedtuple('MeterStatistics', [
+    'meter', 'highest_day', 'highest_usage', 'max_time', 'max_value', 'day_times', 'day_values'
+])
+
+def build_usage_cube(df):
+    # Reshape the rows into a (day x time slot x meter) array in a single pass
+    df = ensure_compact(df)
+    meters = meter_columns(df)
+    day_codes, days = pd.factorize(df[DAY], sort=True)
+    slot_codes, slots = pd.factorize(df[SLOT], sort=True)
+
+    cube = np.full((len(days), len(slots), len(meters)), np.nan)
+    cube[day_codes, slot_codes, :] = readings(df[meters])
+    present = np.zeros((len(days), len(slots)), dtype=bool)
+    present[day_codes, slot_codes] = True
+
+    return {'meters': meters, 'days': np.asarray(days), 'slots': np.asarray(slots), 'cube': cube, 'present': present}
+
+def compute_meter_statistics(usage_cube, daily_totals=None):
+    meters, days, slots = usage_cube['meters'], usage_cube['days'], usage_cube['slots']
+    cube, present = usage_cube['cube'], usage_cube['present']
+    if not meters or len(days) == 0:
+        return {}
+
+    # Highest day per meter (first one on ties, like idxmax)
+    if daily_totals is not None:
+        daily_usage = daily_totals.reindex(index=days, columns=meters).to_numpy(dtype=float)
+    else:
+        daily_usage = np.nansum(cube, axis=1)
+    highest_day_idx = np.argmax(daily_usage, axis=0)
+    meter_idx = np.arange(len(meters))
+    highest_usage = daily_usage[highest_day_idx, meter_idx]
+
+    # Peak slot within each meter's highest day
+    highest_day_values = cube[highest_day_idx, :, meter_idx]  # (meter x slot)
+    peak_slot_idx = np.argmax(np.where(np.isnan(highest_day_values), -np.inf, highest_day_values), axis=1)
+    max_values = highest_day_values[meter_idx, peak_slot_idx]
+
+    statistics = {}
+    for i, meter in enumerate(meters):
+        day_mask = present[highest_day_idx[i]]
+        statistics[meter] = MeterStatistics(
+            meter=meter,
+            highest_day=days[highest_day_idx[i]],
+            highest_usage=highest_usage[i],
+            max_time=slots[peak_slot_idx[i]],
+            max_value=max_values[i],
+            day_times=slots[day_mask],
+            day_values=highest_day_values[i][day_mask]
+        )
+    return statistics
+
+def get_meter_statistics(data):
+    # Computed once per dataset version and shared by every statistics request
+    rollups = resolve_rollups(data)
+    daily_totals = rollups['daily_totals'] if rollups is not None else None
+    return resolve_derived(
+        data, 'meter_statistics', lambda df: compute_meter_statistics(build_usage_cube(df), daily_totals)
+    )
+
+def render_meter_statistics(stats):
+    label = value_to_label.get(stats.meter, stats.meter)
+    highest_day = day_label(stats.highest_day)
+    max_time = slot_label(stats.max_time)
+
+    # Create a line graph for the highest day
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=slot_labels(stats.day_times),
+        y=stats.day_values,
+        mode='lines+markers',
+        name=f'{label} Usage'
+    ))
+
+    # Highlight the maximum point
+    fig.add_trace(go.Scatter(
+        x=[max_time],
+        y=[stats.max_value],
+        mode='markers',
+        marker=dict(size=10, color='red'),
+        name='Max Usage'
+    ))
+
+    fig.update_layout(
+        title=f'{label} Usage on {highest_day}',
+        xaxis_title='Time',
+        yaxis_title=f'{label} Usage',
+        template='plotly_white'
+    )
+
+    return html.Div([
+        html.P(f"Highest Day for {label}: {highest_day}"),
+        html.P(f"Highest Usage: {stats.highest_usage}"),
+        html.P(f"Time of Maximum Usage: {max_time}"),
+        dcc.Graph(figure=fig, className='statistics-graph')
+    ], className='statistics-written-data')
+
 def register_statistics_callbacks(app):
     @app.callback(
         Output('statistics-output', 'children'),
@@ -15,114 +118,22 @@ def register_statistics_callbacks(app):
          Input('data-store', 'data')]
     )
     def calculate_statistics(energy_type, data):
-        if not data:
+        if not is_ready():
+            return loading_message()
+
+        # Resolve the data-store handle to the server-side DataFrame
+        df = resolve_dataset(data)
+        if df is None or df.empty:
             return "No statistics to display. Please upload data or select an energy type."
 
-        # Convert the data-store to a DataFrame
-        df = pd.DataFrame(data)
+        statistics = get_meter_statistics(data)
 
-        # If "all" is selected, calculate stats for each energy type
+        # If "all" is selected, render stats for each energy type
         if energy_type == 'all':
-            energy_columns = df.columns[2:]  # Assuming energy columns start from the 3rd column
-            stats_output = []
-
-            for col in energy_columns:
-                # Calculate daily usage for the current energy type
-                daily_usage = df.groupby('Date')[col].sum()
-                highest_day = daily_usage.idxmax()
-                highest_usage = daily_usage.max()
-
-                # Filter data for the highest day
-                highest_day_data = df[df['Date'] == highest_day]
-
-                # Find the exact time of maximum usage
-                max_time_row = highest_day_data.loc[highest_day_data[col].idxmax()]
-                max_time = max_time_row['Time']
-                max_value = max_time_row[col]
-
-                # Create a line graph for the highest day
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=highest_day_data['Time'],
-                    y=highest_day_data[col],
-                    mode='lines+markers',
-                    name=f'{value_to_label.get(col, col)} Usage'
-                ))
-
-                # Highlight the maximum point
-                fig.add_trace(go.Scatter(
-                    x=[max_time],
-                    y=[max_value],
-                    mode='markers',
-                    marker=dict(size=10, color='red'),
-                    name='Max Usage'
-                ))
-
-                fig.update_layout(
-                    title=f'{value_to_label.get(col, col)} Usage on {highest_day}',
-                    xaxis_title='Time',
-                    yaxis_title=f'{value_to_label.get(col, col)} Usage',
-                    template='plotly_white'
-                )
-
-                # Append statistics and graph for the current energy type
-                stats_output.append(html.Div([
-                    html.P(f"Highest Day for {value_to_label.get(col, col)}: {highest_day}"),
-                    html.P(f"Highest Usage: {highest_usage}"),
-                    html.P(f"Time of Maximum Usage: {max_time}"),
-                    dcc.Graph(figure=fig, className='statistics-graph')
-                ], className='statistics-written-data'))
-
-            return stats_output
+            return [render_meter_statistics(stats) for stats in statistics.values()]
 
         # If a specific energy type is selected
-        elif energy_type in df.columns:
-            df = df[['Date', 'Time', energy_type]]
-
-            # Calculate daily usage
-            daily_usage = df.groupby('Date')[energy_type].sum()
-            highest_day = daily_usage.idxmax()
-            highest_usage = daily_usage.max()
-
-            # Filter data for the highest day
-            highest_day_data = df[df['Date'] == highest_day]
-
-            # Find the exact time of maximum usage
-            max_time_row = highest_day_data.loc[highest_day_data[energy_type].idxmax()]
-            max_time = max_time_row['Time']
-            max_value = max_time_row[energy_type]
-
-            # Create a line graph for the highest day
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=highest_day_data['Time'],
-                y=highest_day_data[energy_type],
-                mode='lines+markers',
-                name=f'{value_to_label.get(energy_type, energy_type)} Usage'
-            ))
-
-            # Highlight the maximum point
-            fig.add_trace(go.Scatter(
-                x=[max_time],
-                y=[max_value],
-                mode='markers',
-                marker=dict(size=10, color='red'),
-                name='Max Usage'
-            ))
-
-            fig.update_layout(
-                title=f'{value_to_label.get(energy_type, energy_type)} Usage on {highest_day}',
-                xaxis_title='Time',
-                yaxis_title=f'{value_to_label.get(energy_type, energy_type)} Usage',
-                template='plotly_white'
-            )
-
-            # Return the statistics and graph
-            return html.Div([
-                html.P(f"Highest Day for {value_to_label.get(energy_type, energy_type)}: {highest_day}"),
-                html.P(f"Highest Usage: {highest_usage}"),
-                html.P(f"Time of Maximum Usage: {max_time}"),
-                dcc.Graph(figure=fig, className='statistics-graph')
-            ], className='statistics-written-data')
+        elif energy_type in statistics:
+            return render_meter_statistics(statistics[energy_type])
 
         return "Invalid energy type selected."
@@ -0,0 +1,109 @@
+# app/table_paging.py
+import math
+import pandas as pd
+from app.compact_schema import LABEL_NAMES, READING_DTYPE, SOURCE_COLUMNS, readings, to_labels
+
+# Rows sent to the browser per page of the dashboard table
+DEFAULT_PAGE_SIZE = 50
+
+# Operators understood in DataTable filter queries, in the order they are matched
+FILTER_OPERATORS = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith ']
+]
+
+
+def split_filter_part(filter_part):
+    # Turns "{column} op value" into (column, operator, value)
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                # Word operators need spaces after them in the filter string, but we don't want them later
+                return name, operator_type[0].strip(), value
+
+    return None, None, None
+
+
+def _source_column(df, col_name):
+    # The table shows Date and Time; a compact frame holds them as Day and Slot
+    if col_name not in df.columns and SOURCE_COLUMNS.get(col_name) in df.columns:
+        return SOURCE_COLUMNS[col_name]
+    return col_name
+
+
+def _filter_column(df, col_name):
+    column = df[_source_column(df, col_name)]
+    if column.name in LABEL_NAMES:
+        return to_labels(column.to_frame())[col_name]
+    if column.dtype == READING_DTYPE:
+        return pd.Series(readings(column), index=column.index)
+    return column
+
+
+def apply_filter_query(df, filter_query):
+    if not filter_query:
+        return df
+
+    for filter_part in filter_query.split(' && '):
+        col_name, operator, filter_value = split_filter_part(filter_part)
+        if _source_column(df, col_name) not in df.columns:
+            continue
+
+        column = _filter_column(df, col_name)
+        if not pd.api.types.is_numeric_dtype(column):
+            # Dates and times are compared as ISO strings, which sort the same way
+            column = column.astype(str)
+            filter_value = str(filter_value)
+        elif isinstance(filter_value, str) and operator not in ('contains', 'datestartswith'):
+            continue
+
+        if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+            df = df.loc[getattr(column, operator)(filter_value)]
+        elif operator == 'contains':
+            df = df.loc[column.astype(str).str.contains(str(filter_value), regex=False)]
+        elif operator == 'datestartswith':
+            df = df.loc[column.astype(str).str.startswith(str(filter_value))]
+
+    return df
+
+
+def apply_sort(df, sort_by):
+    # Day and slot numbers sort the same way as their labels
+    sort_by = [dict(col, column_id=_source_column(df, col['column_id'])) for col in (sort_by or [])]
+    sort_by = [col for col in sort_by if col['column_id'] in df.columns]
+    if not sort_by:
+        return df
+    return df.sort_values(
+        [col['column_id'] for col in sort_by],
+        ascending=[col['direction'] == 'asc' for col in sort_by],
+        kind='stable'
+    )
+
+
+def get_page(df, page_current, page_size, sort_by=None, filter_query=None):
+    """Filter, sort and slice ``df`` on the server; returns (records, page_count) with only the page labelled."""
+    page_current = page_current or 0
+    page_size = page_size or DEFAULT_PAGE_SIZE
+
+    df = apply_sort(apply_filter_query(df, filter_query), sort_by)
+    page = to_labels(df.iloc[page_current * page_size: (page_current + 1) * page_size])
+    return page.to_dict('records'), max(1, math.ceil(len(df) / page_size))
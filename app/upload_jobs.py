@@ -0,0 +1,170 @@
+# app/upload_jobs.py
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from app.compact_schema import to_days
+from app.config import pulse_ratios, energy_type_mapping
+from app.data_processing import process_uploaded_file, merge_uploaded_data
+from app.dataset_registry import get_current_version, get_dataset, publish_dataset, resolve_dataset
+from app.shared_cache import get_shared_cache
+from app.usage_store import store_frame
+
+# Upload jobs run one at a time by default so each merges on top of the previous one
+UPLOAD_JOB_WORKERS = int(os.getenv('UPLOAD_JOB_WORKERS', '1'))
+# Finished jobs can be polled for this long (seconds)
+UPLOAD_JOB_TTL = int(os.getenv('UPLOAD_JOB_TTL', str(60 * 60)))
+
+_executor = None
+_executor_lock = threading.Lock()
+# Merging and publishing happen one job at a time, each on top of the version current when it runs
+_merge_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_JOB_WORKERS, thread_name_prefix='upload-job')
+        return _executor
+
+
+def _save_job(job):
+    # Kept in the shared cache so any worker can answer the progress poll
+    get_shared_cache().set_json(f"upload-job:{job['id']}", job, ttl=UPLOAD_JOB_TTL)
+
+
+def get_upload_job(job_id):
+    return get_shared_cache().get_json(f'upload-job:{job_id}') if job_id else None
+
+
+def make_job_handle(job_id):
+    # What the page keeps in upload-job-store while it polls
+    return {'job_id': job_id, 'submitted_at': time.time()}
+
+
+def may_still_appear(job_handle):
+    """Whether a job that can't be found yet is worth polling for.
+
+    Without redis each gunicorn worker only sees its own jobs, so a poll that
+    lands on another worker finds nothing even though the job is running.
+    """
+    submitted_at = (job_handle or {}).get('submitted_at')
+    return submitted_at is not None and time.time() - submitted_at < UPLOAD_JOB_TTL
+
+
+def upload_summary(file_count):
+    # Map pulse ratios to user-friendly labels
+    pulse_ratios_applied = "\n".join(
+        [f"- {energy_type_mapping.get(key, key)}: {value}" for key, value in pulse_ratios.items()]
+    )
+    return (
+        f"{file_count} files uploaded and processed successfully.\n"
+        f"Pulse ratios applied:\n{pulse_ratios_applied}"
+    )
+
+
+def run_upload_job(job, contents_list, filenames, data, app_context=None):
+    """Parse the uploaded files, merge them into the current dataset and publish the result.
+
+    ``data`` (the handle the upload was made from) is only used when no dataset has been published yet.
+    """
+    job['status'] = 'running'
+    _save_job(job)
+
+    def workbook_parsed(name):
+        job['workbooks_parsed'] += 1
+        _save_job(job)
+
+    # Parse only the uploaded workbooks; the files are also saved to CSV_files for the next startup
+    uploaded_frames = []
+    for contents, filename in zip(contents_list, filenames):
+        try:
+            df_new = process_uploaded_file(contents, filename, None, background_save=False, progress=workbook_parsed)
+            if df_new is not None:
+                uploaded_frames.append(df_new)
+        except Exception as e:
+            job['errors'].append(f"{filename}: {e}")
+        job['files_done'] += 1
+        _save_job(job)
+
+    uploaded_df = pd.concat(uploaded_frames, ignore_index=True) if uploaded_frames else None
+    # Rollups are refreshed only for the days the upload touched
+    changed_days = None
+    if uploaded_df is not None and 'Date' in uploaded_df.columns:
+        changed_days = set(to_days(uploaded_df['Date']).tolist())
+        job['rows_merged'] = len(uploaded_df)
+
+    # Merging onto the handle captured at submit time would drop the rows of any upload published since
+    with _merge_lock:
+        base_version = get_current_version()
+        existing_df = get_dataset(base_version) if base_version is not None else resolve_dataset(data)
+        updated_df = merge_uploaded_data(existing_df, uploaded_df, pulse_ratios)
+        job['version'] = publish_dataset(updated_df, base_version=base_version, changed_days=changed_days)
+
+    # Keep the uploaded days in the database so they survive restarts
+    try:
+        if app_context is None:
+            store_frame(updated_df, changed_days)
+        else:
+            with app_context():
+                store_frame(updated_df, changed_days)
+    except Exception as e:
+        logging.error(f"Error storing uploaded data: {e}")
+
+    job['status'] = 'done'
+    job['message'] = upload_summary(len(filenames) - len(job['errors']))
+    _save_job(job)
+    return job
+
+
+def _run_upload_job_logged(*args, **kwargs):
+    job = args[0]
+    try:
+        return run_upload_job(*args, **kwargs)
+    except Exception as e:
+        logging.error(f"Upload job {job['id']} failed: {e}")
+        job['status'] = 'failed'
+        job['errors'].append(str(e))
+        _save_job(job)
+        return job
+
+
+def submit_upload_job(contents_list, filenames, data, app_context=None):
+    """Queue an upload and return its job id; progress is read back with get_upload_job."""
+    job = {
+        'id': uuid.uuid4().hex,
+        'status': 'queued',
+        'files_total': len(filenames),
+        'files_done': 0,
+        'workbooks_parsed': 0,
+        'rows_merged': 0,
+        'errors': [],
+        'version': None,
+        'message': ''
+    }
+    _save_job(job)
+    _get_executor().submit(_run_upload_job_logged, job, contents_list, filenames, data, app_context)
+    return job['id']
+
+
+def describe_upload_job(job, waiting=False):
+    if job is None:
+        return "Waiting for the upload status..." if waiting else "Upload status is no longer available."
+    if job['status'] == 'queued':
+        return "Upload queued..."
+    if job['status'] == 'running':
+        return (
+            f"Processing upload: {job['files_done']}/{job['files_total']} files, "
+            f"{job['workbooks_parsed']} workbooks parsed, {len(job['errors'])} errors"
+        )
+    errors = "\n".join(f"- {error}" for error in job['errors'])
+    if job['status'] == 'failed':
+        return f"Upload failed:\n{errors}"
+    message = f"{job['message']}\n{job['rows_merged']} rows merged."
+    if errors:
+        message += f"\nThese files could not be processed:\n{errors}"
+    return message
@@ -0,0 +1,158 @@
+# app/usage_store.py
+import io
+import logging
+import pandas as pd
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import sqlite
+from app.compact_schema import (
+    DAY, KEY_COLUMNS, SLOT, day_dates, ensure_compact, meter_columns, readings, slot_labels, to_days
+)
+from app.database import db
+from app.models import UploadedData
+
+# Readings sent per INSERT batch on databases without COPY
+INSERT_CHUNK_SIZE = 5000
+
+
+def frame_to_long(df):
+    """Melt a wide (compact or Date, Time) frame into UploadedData rows, dropping missing readings."""
+    df = ensure_compact(df)
+    long_df = df.melt(
+        id_vars=KEY_COLUMNS, value_vars=meter_columns(df), var_name='energy_type', value_name='usage'
+    ).dropna(subset=['usage'])
+    return pd.DataFrame({
+        'energy_type': long_df['energy_type'].astype(str).to_numpy(),
+        'date': day_dates(long_df[DAY]),
+        'time': slot_labels(long_df[SLOT]),
+        'usage': readings(long_df['usage'])
+    })
+
+
+def _long_to_frame(long_df, meters):
+    # Back to the wide layout used everywhere else, meters in the given order
+    if long_df.empty:
+        return pd.DataFrame(columns=['Date', 'Time'] + list(meters))
+    wide = long_df.pivot_table(index=['date', 'time'], columns='energy_type', values='usage', aggfunc='first')
+    wide = wide.reindex(columns=list(meters)).reset_index().rename(columns={'date': 'Date', 'time': 'Time'})
+    wide.columns.name = None
+    return wide
+
+
+def _insert_rows(rows):
+    table = UploadedData.__table__
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        _copy_rows(rows)
+        return
+
+    # A reading that is stored again (e.g. from a corrected re-upload) replaces the old value, as in merge_uploaded_data
+    if dialect == 'sqlite':
+        statement = sqlite.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['energy_type', 'date', 'time'], set_={'usage': statement.excluded.usage}
+        )
+    else:
+        statement = insert(table)
+    records = rows.to_dict('records')
+    for start in range(0, len(records), INSERT_CHUNK_SIZE):
+        db.session.execute(statement, records[start:start + INSERT_CHUNK_SIZE])
+    db.session.commit()
+
+
+def _copy_rows(rows):
+    # COPY into a temporary table, then move the rows across, replacing readings that are already stored
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE uploaded_data_incoming "
+            "(energy_type varchar(255), date date, time varchar(8), usage double precision) ON COMMIT DROP"
+        )
+        cursor.copy_expert(
+            "COPY uploaded_data_incoming (energy_type, date, time, usage) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        cursor.execute(
+            f"INSERT INTO {UploadedData.__tablename__} (energy_type, date, time, usage) "
+            "SELECT energy_type, date, time, usage FROM uploaded_data_incoming "
+            "ON CONFLICT (energy_type, date, time) DO UPDATE SET usage = excluded.usage"
+        )
+    finally:
+        cursor.close()
+    db.session.commit()
+
+
+def store_frame(df, days=None):
+    """Bulk-insert the readings of ``df`` (only ``days``, as day numbers, when given); returns the number of rows sent."""
+    df = ensure_compact(df)
+    if df is None or df.empty or DAY not in df.columns or SLOT not in df.columns:
+        return 0
+    if days is not None:
+        df = df[df[DAY].isin(set(days))]
+    # A key may only appear once per INSERT ... ON CONFLICT DO UPDATE; the last reading wins
+    rows = frame_to_long(df).drop_duplicates(subset=['energy_type', 'date', 'time'], keep='last')
+    if rows.empty:
+        return 0
+    _insert_rows(rows)
+    return len(rows)
+
+
+def stored_meters():
+    # Meters in the order they were first stored, which is the column order of the workbooks
+    statement = (
+        select(UploadedData.energy_type)
+        .group_by(UploadedData.energy_type)
+        .order_by(func.min(UploadedData.id))
+    )
+    return list(db.session.execute(statement).scalars())
+
+
+def stored_dates():
+    return set(db.session.execute(select(UploadedData.date).distinct()).scalars())
+
+
+def query_usage(start_date=None, end_date=None, meters=None, dates=None):
+    """Wide (Date, Time, meter...) frame for a date range, dates and set of meters, filtered in SQL."""
+    statement = select(UploadedData.date, UploadedData.time, UploadedData.energy_type, UploadedData.usage)
+    if meters:
+        statement = statement.where(UploadedData.energy_type.in_(meters))
+    if dates is not None:
+        statement = statement.where(UploadedData.date.in_(list(dates)))
+    if start_date is not None:
+        statement = statement.where(UploadedData.date >= start_date)
+    if end_date is not None:
+        statement = statement.where(UploadedData.date <= end_date)
+
+    long_df = pd.DataFrame(db.session.execute(statement).all(), columns=['date', 'time', 'energy_type', 'usage'])
+    return _long_to_frame(long_df, meters or stored_meters())
+
+
+def load_dataset(df_files, changed_dates=None):
+    """Store the workbook days UploadedData is missing or that changed, and return the dataset to serve.
+
+    ``df_files`` is served as it is, plus the days that only UploadedData has (e.g. uploaded days).
+    ``changed_dates`` are the dates of the new or changed workbooks; ``None`` stores every day.
+    Falls back to ``df_files`` if the database can't be used.
+    """
+    file_dates = set(df_files['Date']) if not df_files.empty and 'Date' in df_files.columns else set()
+    try:
+        table_dates = stored_dates()
+        # Unchanged workbooks are already stored, unless the database is newer than the workbook cache
+        dates_to_store = file_dates if changed_dates is None else (set(changed_dates) | (file_dates - table_dates))
+        if dates_to_store:
+            row_count = store_frame(df_files, set(to_days(sorted(dates_to_store & file_dates))))
+            logging.info(f"Stored {row_count} workbook readings from {len(dates_to_store)} day(s) in the database.")
+        extra_dates = table_dates - file_dates
+        df_stored = query_usage(dates=extra_dates) if extra_dates else None
+    except Exception as e:
+        logging.error(f"Error loading data from the database: {e}")
+        db.session.rollback()
+        return df_files
+    if df_stored is None or df_stored.empty:
+        return df_files
+    logging.info(f"Loaded {len(extra_dates)} day(s) that are only in the database.")
+    if df_files.empty:
+        return df_stored
+    return pd.concat([df_files, df_stored], ignore_index=True).sort_values(['Date', 'Time'], ignore_index=True)
@@ -0,0 +1,58 @@
+# app/warmup.py
+import logging
+import os
+import threading
+import time
+
+# 'background' binds the server straight away and loads the data in a thread;
+# 'blocking' loads during import (used with gunicorn --preload, see gunicorn.conf.py)
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'background')
+
+_ready = threading.Event()
+_state = {'error': None, 'seconds': None, 'load': None}
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def get_warmup_error():
+    return _state['error']
+
+
+def _run(load):
+    started = time.perf_counter()
+    try:
+        load()
+        _state['seconds'] = time.perf_counter() - started
+        logging.info(f"Data warm-up finished in {_state['seconds']:.1f}s.")
+    except Exception as e:
+        logging.error(f"Data warm-up failed: {e}")
+        _state['error'] = str(e)
+    finally:
+        _ready.set()
+
+
+def start_warmup(load, mode=STARTUP_MODE):
+    """Run ``load`` now ('blocking') or in a daemon thread ('background')."""
+    _ready.clear()
+    _state['error'] = None
+    _state['load'] = load
+    if mode == 'blocking':
+        _run(load)
+        return None
+    thread = threading.Thread(target=_run, args=(load,), name='data-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def resume_after_fork():
+    # Threads don't survive fork(), so a warm-up still running in the gunicorn master is restarted in the worker
+    if not is_ready() and _state['load'] is not None:
+        start_warmup(_state['load'], mode='background')
+
+
+def loading_message():
+    if get_warmup_error():
+        return f"Data could not be loaded: {get_warmup_error()}"
+    return "Loading data, please wait..."
@@ -0,0 +1,185 @@
+# app/workbook_cache.py
+import argparse
+import json
+import logging
+import os
+import pandas as pd
+
+# The cache lives next to the workbooks it describes, e.g. CSV_files/.workbook_cache
+CACHE_DIR_NAME = '.workbook_cache'
+MANIFEST_NAME = 'manifest.json'
+DATA_NAME = 'workbooks.parquet'
+CACHE_FORMAT_VERSION = 1
+SOURCE_COLUMN = '__source'
+
+
+def get_cache_dir(path):
+    return os.path.join(path, CACHE_DIR_NAME)
+
+
+def _file_key(filename):
+    # A workbook is considered unchanged while its size and mtime are unchanged
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_manifest(cache_dir):
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Error reading workbook cache manifest {manifest_path}: {e}")
+        return None
+
+
+def verify_cache(cache_dir):
+    """Cheap integrity check: compares the manifest against the Parquet footer only.
+
+    Returns a tuple of (is_valid, reason).
+    """
+    manifest = read_manifest(cache_dir)
+    if manifest is None:
+        return False, "manifest missing or unreadable"
+    if manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return False, "cache format version mismatch"
+
+    data_path = os.path.join(cache_dir, DATA_NAME)
+    if not os.path.exists(data_path):
+        return False, "data file missing"
+    if os.path.getsize(data_path) != manifest.get('data_size'):
+        return False, "data file size does not match manifest"
+
+    try:
+        import pyarrow.parquet as pq
+        num_rows = pq.read_metadata(data_path).num_rows
+    except Exception as e:
+        return False, f"unreadable data file: {e}"
+
+    expected_rows = sum(entry['rows'] for entry in manifest.get('files', {}).values())
+    if num_rows != manifest.get('num_rows') or num_rows != expected_rows:
+        return False, "row count does not match manifest"
+
+    return True, "ok"
+
+
+def _write_cache(cache_dir, data, files):
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path = os.path.join(cache_dir, DATA_NAME)
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+
+    # Write to temporary files first so a crash never leaves a half-written cache behind
+    tmp_data_path = data_path + '.tmp'
+    data.to_parquet(tmp_data_path, index=False)
+    os.replace(tmp_data_path, data_path)
+
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'data_size': os.path.getsize(data_path),
+        'num_rows': len(data),
+        'files': files
+    }
+    tmp_manifest_path = manifest_path + '.tmp'
+    with open(tmp_manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest_path, manifest_path)
+
+
+def load_workbooks(path, filenames, parse_workbook, changed=None):
+    """Return the parsed contents of ``filenames`` as a list of DataFrames.
+
+    Workbooks whose path, size and mtime match the manifest are read from the
+    Parquet cache; only new or changed workbooks are passed to ``parse_workbook``.
+    ``parse_workbook(filenames)`` must return a list of (filename, DataFrame or None).
+    The frames of the new or changed workbooks are also appended to ``changed`` when given.
+    """
+    cache_dir = get_cache_dir(path)
+    is_valid, reason = verify_cache(cache_dir)
+    if is_valid:
+        manifest = read_manifest(cache_dir)
+    else:
+        if os.path.exists(cache_dir):
+            logging.info(f"Rebuilding workbook cache in {cache_dir}: {reason}")
+        manifest = {'files': {}}
+
+    cached_files = manifest['files']
+    current_files = {}
+    fresh, stale = [], []
+    for filename in filenames:
+        relative_name = os.path.relpath(filename, path)
+        key = _file_key(filename)
+        current_files[relative_name] = key
+        cached_entry = cached_files.get(relative_name)
+        if cached_entry and cached_entry['size'] == key['size'] and cached_entry['mtime_ns'] == key['mtime_ns']:
+            fresh.append(relative_name)
+        else:
+            stale.append(filename)
+
+    frames = []
+    if fresh:
+        cached_data = pd.read_parquet(os.path.join(cache_dir, DATA_NAME))
+        cached_data = cached_data[cached_data[SOURCE_COLUMN].isin(fresh)]
+        # Parquet stores the union of all meter columns; drop the ones that are empty for this subset
+        frames.append(cached_data.dropna(axis=1, how='all'))
+
+    new_entries = {name: cached_files[name] for name in fresh}
+    for filename, df in parse_workbook(stale):
+        if df is None:
+            continue
+        relative_name = os.path.relpath(filename, path)
+        df = df.copy()
+        df[SOURCE_COLUMN] = relative_name
+        frames.append(df)
+        new_entries[relative_name] = dict(current_files[relative_name], rows=len(df))
+        if changed is not None:
+            changed.append(df.drop(columns=SOURCE_COLUMN))
+
+    if new_entries.keys() != cached_files.keys() or stale:
+        try:
+            data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({SOURCE_COLUMN: []})
+            _write_cache(cache_dir, data, new_entries)
+        except Exception as e:
+            logging.error(f"Error writing workbook cache in {cache_dir}: {e}")
+
+    return [frame.drop(columns=SOURCE_COLUMN) for frame in frames]
+
+
+def clear_cache(path):
+    cache_dir = get_cache_dir(path)
+    for name in (DATA_NAME, MANIFEST_NAME):
+        file_path = os.path.join(cache_dir, name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def rebuild_cache(path, workers=None, timings=None):
+    from app.data_processing import load_initial_csv_data
+
+    clear_cache(path)
+    return load_initial_csv_data(path=path, workers=workers, timings=timings)
+
+
+if __name__ == '__main__':
+    from app.data_processing import UPLOAD_FOLDER
+
+    parser = argparse.ArgumentParser(description="Manage the parsed workbook cache.")
+    parser.add_argument('command', choices=['verify', 'rebuild', 'clear'])
+    parser.add_argument('--path', default=UPLOAD_FOLDER, help="Folder containing the daily report workbooks.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of processes used to parse workbooks.")
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        is_valid, reason = verify_cache(get_cache_dir(args.path))
+        print(f"Workbook cache {'OK' if is_valid else 'INVALID'}: {reason}")
+        raise SystemExit(0 if is_valid else 1)
+    elif args.command == 'rebuild':
+        timings = []
+        df = rebuild_cache(args.path, workers=args.workers, timings=timings)
+        print(f"Workbook cache rebuilt with {len(df)} rows from {len(timings)} workbooks.")
+        for timing in sorted(timings, key=lambda timing: timing['seconds'], reverse=True)[:10]:
+            print(f"  {timing['seconds']:.3f}s  {timing['rows']:>6} rows  {os.path.relpath(timing['file'], args.path)}")
+    else:
+        clear_cache(args.path)
+        print("Workbook cache cleared.")
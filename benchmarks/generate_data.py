@@ -0,0 +1,79 @@
+# benchmarks/generate_data.py
+import argparse
+import os
+import zipfile
+from datetime import date, datetime, timedelta
+import numpy as np
+from openpyxl import Workbook
+
+# The real meters first, so pulse ratios and the gas conversion have columns to work on
+KNOWN_METERS = ['TH-E-01', 'TH-PM-01.TH-G-01', 'TH-PM-01.TH-W-01', 'TH-PM-01.TH-W-02']
+# Typical half-hourly delta per meter, before pulse ratios
+METER_SCALES = {'TH-E-01': 4.0, 'TH-PM-01.TH-G-01': 20.0, 'TH-PM-01.TH-W-01': 60.0, 'TH-PM-01.TH-W-02': 30.0}
+
+# 00:00:00 to 24:00:00 in half hours, as in the exports
+SLOTS = [f"{minutes // 60:02d}:{minutes % 60:02d}:00" for minutes in range(0, 24 * 60 + 1, 30)]
+
+
+def meter_names(count):
+    extra = [f"TH-PM-01.TH-X-{index:02d}" for index in range(1, max(0, count - len(KNOWN_METERS)) + 1)]
+    return (KNOWN_METERS + extra)[:count]
+
+
+def meter_column(meter):
+    return f"{meter} kWh (kWh) [DELTA] 1"
+
+
+def workbook_path(path, day, meter):
+    return os.path.join(path, day.isoformat(), f"{day.isoformat()}_Daily Report_{meter}_All Meters Delta.xlsx")
+
+
+def write_workbook(filename, day, meter, values):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append(['Date', 'Time', meter_column(meter)])
+    timestamp = datetime(day.year, day.month, day.day)
+    for slot, value in zip(SLOTS, values):
+        sheet.append([timestamp, slot, None if np.isnan(value) else round(float(value), 3)])
+    workbook.save(filename)
+
+
+def generate_workbooks(path, days, meters, start=date(2024, 1, 1), seed=0):
+    """Write ``days`` x ``meters`` daily-report workbooks under ``path``; returns their paths.
+
+    The same arguments always produce the same readings.
+    """
+    rng = np.random.default_rng(seed)
+    hours = np.arange(len(SLOTS)) / 2
+    # Daytime peak on top of a base load
+    profile = 0.6 + 0.4 * np.exp(-((hours - 13) ** 2) / 18)
+
+    filenames = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        os.makedirs(os.path.join(path, day.isoformat()), exist_ok=True)
+        for meter in meter_names(meters):
+            values = METER_SCALES.get(meter, 10.0) * profile * rng.uniform(0.8, 1.2, len(SLOTS))
+            values[0] = np.nan  # The first slot of each export has no delta
+            filename = workbook_path(path, day, meter)
+            write_workbook(filename, day, meter, values)
+            filenames.append(filename)
+    return filenames
+
+
+def write_zip(filenames, zip_path):
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename in filenames:
+            archive.write(filename, arcname=os.path.join(os.path.basename(os.path.dirname(filename)),
+                                                         os.path.basename(filename)))
+    return zip_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic daily-report workbooks.")
+    parser.add_argument('path')
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--meters', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(f"Wrote {len(generate_workbooks(args.path, args.days, args.meters, seed=args.seed))} workbooks to {args.path}")
@@ -0,0 +1,336 @@
+# benchmarks/load_test.py
+"""Replay dashboard callbacks through /_dash-update-component with concurrent users.
+
+    python -m benchmarks.load_test --users 8 --rounds 2                  # in-process, Flask test client
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --users 8 # against a running gunicorn
+    python -m benchmarks.load_test --record payloads.json                # save the generated payloads
+    python -m benchmarks.load_test --payloads payloads.json              # replay saved payloads
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.config import energy_meter_options
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'results', 'load_test.json')
+
+UPDATE_PATH = '/_dash-update-component'
+LAYOUT_PATH = '/_dash-layout'
+VIEWS = ['table', 'graph', 'heatmap']
+
+
+class InProcessClient:
+    # One Flask test client per user, so each keeps its own session cookie
+    def __init__(self, server):
+        self.client = server.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.data
+
+    def post(self, path, payload):
+        response = self.client.post(path, json=payload)
+        return response.status_code, response.data
+
+
+class HttpClient:
+    def __init__(self, url, timeout=60):
+        import requests
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get(self, path):
+        response = self.session.get(self.url + path, timeout=self.timeout)
+        return response.status_code, response.content
+
+    def post(self, path, payload):
+        response = self.session.post(self.url + path, json=payload, timeout=self.timeout)
+        return response.status_code, response.content
+
+
+def callback_payload(outputs, inputs, state=()):
+    """Build the body Dash posts for a callback; outputs are (id, property), inputs and state (id, property, value)."""
+    output_specs = [{'id': component_id, 'property': prop} for component_id, prop in outputs]
+    if len(output_specs) == 1:
+        output = f"{outputs[0][0]}.{outputs[0][1]}"
+        output_specs = output_specs[0]
+    else:
+        output = '..' + '...'.join(f"{component_id}.{prop}" for component_id, prop in outputs) + '..'
+    return {
+        'output': output,
+        'outputs': output_specs,
+        'inputs': [{'id': component_id, 'property': prop, 'value': value} for component_id, prop, value in inputs],
+        'state': [{'id': component_id, 'property': prop, 'value': value} for component_id, prop, value in state],
+        'changedPropIds': [f"{inputs[0][0]}.{inputs[0][1]}"]
+    }
+
+
+def login_payload(username, password):
+    return callback_payload(
+        [('theme-wrapper', 'children'), ('url', 'pathname')],
+        [('login-button', 'n_clicks', 1)],
+        [('username', 'value', username), ('password', 'value', password)]
+    )
+
+
+def update_combined_payload(view, meter, date, handle):
+    return callback_payload(
+        [('output-container', 'children'), ('date-dropdown', 'options'),
+         ('date-dropdown', 'value'), ('energy-type-dropdown', 'value')],
+        [('view-type-radio', 'value', view), ('energy-type-dropdown', 'value', meter),
+         ('date-dropdown', 'value', date), ('data-store', 'data', handle)]
+    )
+
+
+def statistics_payload(meter, handle):
+    return callback_payload(
+        [('statistics-output', 'children')],
+        [('statistics-energy-type-dropdown', 'value', meter), ('data-store', 'data', handle)]
+    )
+
+
+def costs_payload(meter, start_date, end_date, handle):
+    return callback_payload(
+        [('costs-and-carbon-output', 'children')],
+        [('calculate-costs-button', 'n_clicks', 1)],
+        [('data-store', 'data', handle), ('costs-energy-type-dropdown', 'value', meter),
+         ('costs-start-date-dropdown', 'value', start_date), ('costs-end-date-dropdown', 'value', end_date)]
+    )
+
+
+def with_handle(payload, handle):
+    # Recorded payloads are replayed against whatever dataset version the server has now
+    for item in payload['inputs'] + payload['state']:
+        if item['id'] == 'data-store':
+            item['value'] = handle
+    return payload
+
+
+def find_component(layout, component_id):
+    if isinstance(layout, dict):
+        props = layout.get('props', {})
+        if props.get('id') == component_id:
+            return props
+        children = props.get('children')
+        return find_component(children, component_id) if children is not None else None
+    if isinstance(layout, list):
+        for child in layout:
+            found = find_component(child, component_id)
+            if found is not None:
+                return found
+    return None
+
+
+def wait_for_data(client, timeout):
+    """Poll the page layout until the warm-up is done and return the data-store handle."""
+    deadline = time.monotonic() + timeout
+    while True:
+        status, body = client.get(LAYOUT_PATH)
+        if status == 200:
+            layout = json.loads(body)
+            interval = find_component(layout, 'warmup-interval') or {}
+            status_text = (find_component(layout, 'warmup-status') or {}).get('children')
+            if interval.get('disabled'):
+                if status_text:
+                    raise RuntimeError(status_text)
+                return find_component(layout, 'data-store').get('data')
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Data was not ready after {timeout}s")
+        time.sleep(1)
+
+
+def login(client, username, password):
+    status, body = client.post(UPDATE_PATH, login_payload(username, password))
+    if status != 200 or json.loads(body)['response'].get('url', {}).get('pathname') != '/dashboard':
+        raise RuntimeError(f"Login as {username} failed (HTTP {status})")
+
+
+def sample_dates(dates, count):
+    # Spread the sampled days over the whole range
+    if count >= len(dates):
+        return list(dates)
+    if count <= 1:
+        return dates[:count]
+    step = (len(dates) - 1) / (count - 1)
+    return [dates[round(i * step)] for i in range(count)]
+
+
+def build_payloads(client, handle, date_count):
+    """Record one payload per view/meter/date for the dashboard, and per meter for statistics and costs."""
+    status, body = client.post(UPDATE_PATH, update_combined_payload('table', 'all', 'all', handle))
+    if status != 200:
+        raise RuntimeError(f"Could not read the date options (HTTP {status})")
+    date_options = json.loads(body)['response']['date-dropdown']['options']
+    dates = [option['value'] for option in date_options if option['value'] not in ('all', 'average')]
+    if not dates:
+        raise RuntimeError("The dataset has no dates")
+
+    meters = [option['value'] for option in energy_meter_options]
+    labels = {option['value']: option['label'] for option in energy_meter_options}
+    payloads = []
+    for view in VIEWS:
+        for meter in meters:
+            for date in ['all', 'average'] + sample_dates(dates, date_count):
+                payloads.append({
+                    'callback': 'update_combined',
+                    'label': f"{view}/{labels[meter]}/{date}",
+                    'payload': update_combined_payload(view, meter, date, handle)
+                })
+    for meter in meters:
+        payloads.append({
+            'callback': 'calculate_statistics',
+            'label': labels[meter],
+            'payload': statistics_payload(meter, handle)
+        })
+        payloads.append({
+            'callback': 'calculate_costs_and_carbon',
+            'label': f"{labels[meter]}/{dates[0]}..{dates[-1]}",
+            'payload': costs_payload(meter, dates[0], dates[-1], handle)
+        })
+    return payloads
+
+
+def run_user(user, make_client, payloads, rounds, username, password, seed):
+    client = make_client()
+    login(client, username, password)
+    order = random.Random(seed + user)
+    samples = []
+    for _ in range(rounds):
+        requests = list(payloads)
+        order.shuffle(requests)
+        for request in requests:
+            started = time.perf_counter()
+            try:
+                status, body = client.post(UPDATE_PATH, request['payload'])
+                error = None if status == 200 else f"HTTP {status}"
+                size = len(body)
+            except Exception as e:
+                status, size, error = None, 0, str(e)
+            samples.append({
+                'callback': request['callback'],
+                'label': request['label'],
+                'seconds': time.perf_counter() - started,
+                'bytes': size,
+                'error': error
+            })
+    return samples
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of an unsorted list
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarise(samples, wall_seconds):
+    summary = {}
+    for callback in sorted({sample['callback'] for sample in samples}):
+        group = [sample for sample in samples if sample['callback'] == callback]
+        seconds = [sample['seconds'] for sample in group]
+        errors = [sample for sample in group if sample['error']]
+        summary[callback] = {
+            'requests': len(group),
+            'errors': len(errors),
+            'error_examples': sorted({f"{sample['label']}: {sample['error']}" for sample in errors})[:5],
+            'p50_ms': percentile(seconds, 50) * 1000,
+            'p95_ms': percentile(seconds, 95) * 1000,
+            'p99_ms': percentile(seconds, 99) * 1000,
+            'max_ms': max(seconds) * 1000,
+            'mean_kb': statistics.mean(sample['bytes'] for sample in group) / 1024,
+            'max_kb': max(sample['bytes'] for sample in group) / 1024,
+            'throughput_rps': len(group) / wall_seconds if wall_seconds else None
+        }
+    return summary
+
+
+def print_summary(summary, total, wall_seconds, users):
+    print(f"{total} requests from {users} users in {wall_seconds:.1f}s ({total / wall_seconds:.1f} req/s)")
+    print(f"{'callback':<28} {'reqs':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'mean KB':>8} {'max KB':>8}")
+    for callback, row in summary.items():
+        print(f"{callback:<28} {row['requests']:>6} {row['errors']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} {row['mean_kb']:>8.1f} {row['max_kb']:>8.1f}")
+        for example in row['error_examples']:
+            print(f"  {example}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard callbacks.")
+    parser.add_argument('--url', help="base URL of a running server; in-process when omitted")
+    parser.add_argument('--users', type=int, default=4, help="concurrent users")
+    parser.add_argument('--rounds', type=int, default=1, help="times each user replays every payload")
+    parser.add_argument('--dates', type=int, default=3, help="single days sampled per view and meter")
+    parser.add_argument('--username', default='testuser')
+    parser.add_argument('--password', default='testpassword')
+    parser.add_argument('--payloads', help="replay payloads saved with --record instead of generating them")
+    parser.add_argument('--record', help="write the payloads to this file")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--ready-timeout', type=int, default=300, help="seconds to wait for the data warm-up")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.url:
+        def make_client():
+            return HttpClient(args.url)
+    else:
+        import logging
+        from app.app import server
+        # The app logs every request at DEBUG, which would dominate an in-process run
+        logging.getLogger().setLevel(logging.WARNING)
+
+        def make_client():
+            return InProcessClient(server)
+
+    client = make_client()
+    handle = wait_for_data(client, args.ready_timeout)
+    login(client, args.username, args.password)
+
+    if args.payloads:
+        with open(args.payloads) as f:
+            payloads = [dict(request, payload=with_handle(request['payload'], handle)) for request in json.load(f)]
+    else:
+        payloads = build_payloads(client, handle, args.dates)
+    if args.record:
+        with open(args.record, 'w') as f:
+            json.dump(payloads, f, indent=2)
+        print(f"{len(payloads)} payloads written to {args.record}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        futures = [executor.submit(run_user, user, make_client, payloads, args.rounds,
+                                   args.username, args.password, args.seed) for user in range(args.users)]
+        samples = [sample for future in futures for sample in future.result()]
+    wall_seconds = time.perf_counter() - started
+
+    summary = summarise(samples, wall_seconds)
+    print_summary(summary, len(samples), wall_seconds, args.users)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'target': args.url or 'in-process',
+                'users': args.users,
+                'rounds': args.rounds,
+                'payloads': len(payloads),
+                'wall_seconds': wall_seconds
+            },
+            'summary': summary
+        }, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+    return 1 if any(row['errors'] for row in summary.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
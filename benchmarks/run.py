@@ -0,0 +1,175 @@
+# benchmarks/run.py
+"""Time the ingest path on synthetic data and compare against a stored baseline.
+
+    python -m benchmarks.run                      # small and medium tiers
+    python -m benchmarks.run --tiers large --repeat 1
+    python -m benchmarks.run --update-baseline    # after an intended change in speed
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+from app import data_processing
+from app.config import pulse_ratios
+from app.data_processing import apply_pulse_ratios, convert_gas_to_kwh, load_initial_csv_data, process_uploaded_file
+from benchmarks.generate_data import generate_workbooks, write_zip
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# Timings only compare on the same machine, so the baseline is kept with the (untracked) results
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'results', 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'results', 'latest.json')
+
+# name -> (days, meters)
+TIERS = {
+    'small': (7, 4),
+    'medium': (60, 4),
+    'large': (365, 8)
+}
+
+# A case regresses when its median is this much slower than the baseline...
+DEFAULT_TOLERANCE = 0.25
+# ...and by more than this many seconds, so tiny timings don't fail on noise
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def time_call(func, repeat):
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start)
+    return result, {'median': statistics.median(seconds), 'min': min(seconds), 'repeat': repeat}
+
+
+def encode_upload(filename):
+    # Same shape as the contents dcc.Upload sends
+    with open(filename, 'rb') as f:
+        return f"data:application/octet-stream;base64,{base64.b64encode(f.read()).decode('utf-8')}"
+
+
+def run_tier(name, days, meters, repeat, workdir):
+    data_path = os.path.join(workdir, name, 'CSV_files')
+    filenames = generate_workbooks(data_path, days, meters)
+    zip_path = write_zip(filenames, os.path.join(workdir, name, 'upload.zip'))
+    single_contents = encode_upload(filenames[0])
+    zip_contents = encode_upload(zip_path)
+
+    # Uploads are saved to the upload folder, which must not be the real CSV_files
+    data_processing.UPLOAD_FOLDER = os.path.join(workdir, name, 'uploads')
+
+    results = {}
+
+    def record(case, func, runs=repeat):
+        result, timing = time_call(func, runs)
+        timing['rows'] = 0 if result is None else len(result)
+        results[f"{name}/{case}"] = timing
+        print(f"{name:>6} {case:<28} median {timing['median']:.4f}s  min {timing['min']:.4f}s  rows {timing['rows']}")
+        return result
+
+    df = record('load_initial_csv_data_cold', lambda: load_initial_csv_data(data_path, use_cache=False, workers=1))
+    # The first cached run writes the cache, the timed ones read it
+    load_initial_csv_data(data_path, use_cache=True, workers=1)
+    record('load_initial_csv_data_cached', lambda: load_initial_csv_data(data_path, use_cache=True, workers=1))
+    record('process_uploaded_file_xlsx', lambda: process_uploaded_file(
+        single_contents, os.path.basename(filenames[0]), None, background_save=False))
+    record('process_uploaded_file_zip', lambda: process_uploaded_file(
+        zip_contents, 'upload.zip', None, background_save=False))
+    record('apply_pulse_ratios', lambda: apply_pulse_ratios(df.copy(), pulse_ratios))
+    record('convert_gas_to_kwh', lambda: convert_gas_to_kwh(df.copy()))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for case, timing in sorted(results.items()):
+        reference = baseline.get('results', {}).get(case)
+        if reference is None:
+            continue
+        slower = timing['median'] - reference['median']
+        if timing['median'] > reference['median'] * (1 + tolerance) and slower > MIN_REGRESSION_SECONDS:
+            regressions.append(
+                f"{case}: {timing['median']:.4f}s vs baseline {reference['median']:.4f}s "
+                f"(+{slower / reference['median']:.0%})"
+            )
+    return regressions
+
+
+def write_json(filename, payload):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data_processing ingest path.")
+    parser.add_argument('--tiers', default='small,medium', help=f"comma-separated, from {', '.join(TIERS)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true', help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    tiers = [tier.strip() for tier in args.tiers.split(',') if tier.strip()]
+    unknown = [tier for tier in tiers if tier not in TIERS]
+    if unknown:
+        parser.error(f"unknown tier(s): {', '.join(unknown)}")
+
+    upload_folder = data_processing.UPLOAD_FOLDER
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for tier in tiers:
+                days, meters = TIERS[tier]
+                results.update(run_tier(tier, days, meters, args.repeat, workdir))
+    finally:
+        data_processing.UPLOAD_FOLDER = upload_folder
+
+    payload = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'tiers': {tier: {'days': TIERS[tier][0], 'meters': TIERS[tier][1]} for tier in tiers}
+        },
+        'results': results
+    }
+    write_json(args.output, payload)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        write_json(args.baseline, payload)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    recorded_on = baseline.get('meta', {}).get('platform'), baseline.get('meta', {}).get('cpu_count')
+    if recorded_on != (payload['meta']['platform'], payload['meta']['cpu_count']):
+        print(f"Warning: the baseline was recorded on {recorded_on[0]} with {recorded_on[1]} CPU(s); "
+              f"re-record it on this machine with --update-baseline.")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
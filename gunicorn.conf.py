@@ -0,0 +1,20 @@
+# gunicorn.conf.py
+import os
+
+# GUNICORN_PRELOAD=true loads the data once in the master before forking, so the workers share it copy-on-write
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+if preload_app:
+    # A warm-up thread would not survive the fork, so the master loads during import instead
+    os.environ.setdefault('STARTUP_MODE', 'blocking')
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app.app import server as flask_server
+        from app.database import db
+        from app.warmup import resume_after_fork
+
+        # Connections opened by the master must not be shared with the workers
+        with flask_server.app_context():
+            db.engine.dispose(close=False)
+        resume_after_fork()
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date
+from flask import Flask
+from app.database import db, init_db
+
+def _make_frame(days=(date(2025, 3, 27), date(2025, 3, 28)), times=('12:00', '13:00'), **meters):
+    # Wide (Date, Time, meter...) frame with a row per day and time; meter 'A' counts up from 0 by default
+    row_count = len(days) * len(times)
+    meters = meters or {'A': np.arange(row_count, dtype=float)}
+    return pd.DataFrame({'Date': [d for d in days for _ in times], 'Time': list(times) * len(days), **meters})
+
+@pytest.fixture
+def make_frame():
+    return _make_frame
+
+# Flask app on an in-memory SQLite database, with its app context pushed
+@pytest.fixture
+def server():
+    server = Flask(__name__)
+    server.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    server.config['SECRET_KEY'] = 'test'
+    init_db(server)
+    with server.app_context():
+        yield server
+        db.drop_all()
@@ -0,0 +1,30 @@
+import json
+import pandas as pd
+from benchmarks import run
+from app.data_processing import load_initial_csv_data
+from benchmarks.generate_data import generate_workbooks, meter_column, meter_names
+
+# The synthetic workbooks load like the real ones and are the same on every run
+def test_generate_workbooks(tmp_path):
+    first = generate_workbooks(str(tmp_path / 'a'), days=2, meters=5)
+    generate_workbooks(str(tmp_path / 'b'), days=2, meters=5)
+
+    assert len(first) == 10
+    df_a = load_initial_csv_data(str(tmp_path / 'a'), use_cache=False, workers=1)
+    df_b = load_initial_csv_data(str(tmp_path / 'b'), use_cache=False, workers=1)
+    assert len(df_a) == 2 * 49
+    assert {meter_column(meter) for meter in meter_names(5)} <= set(df_a.columns)
+    pd.testing.assert_frame_equal(df_a, df_b)
+
+# A case that got slower than the baseline by more than the tolerance fails the run
+def test_run_exits_non_zero_on_regression(tmp_path, monkeypatch):
+    timings = {'case': {'median': 1.0}}
+    monkeypatch.setattr(run, 'run_tier', lambda *args: dict(timings))
+    baseline = str(tmp_path / 'baseline.json')
+    argv = ['--tiers', 'small', '--output', str(tmp_path / 'latest.json'), '--baseline', baseline]
+
+    assert run.main(argv + ['--update-baseline']) == 0
+    assert json.loads((tmp_path / 'baseline.json').read_text())['results'] == timings
+    assert run.main(argv) == 0
+    timings['case'] = {'median': 1.5}
+    assert run.main(argv) == 1
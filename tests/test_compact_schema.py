@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from app.compact_schema import (
+    DAY, SLOT, build_day_index, day_rows, parse_day, parse_slot, slice_days, slot_label, to_compact, to_labels
+)
+
+def test_to_compact_and_back():
+    df = pd.DataFrame({
+        'Date': [date(2025, 3, 28), date(2025, 3, 27), date(2025, 3, 27)],
+        'Time': ['24:00:00', '12:30:00', '00:00:00'],
+        'A': [1.234, 0.1, None]
+    })
+
+    compact = to_compact(df)
+
+    # Sorted by day and slot, in the narrow types
+    assert compact[DAY].dtype == np.int32 and compact[SLOT].dtype == np.int16 and compact['A'].dtype == np.float32
+    assert compact[DAY].tolist() == [parse_day('2025-03-27')] * 2 + [parse_day(date(2025, 3, 28))]
+    assert compact[SLOT].tolist() == [0, 750, 1440]
+
+    labels = to_labels(compact)
+    assert list(labels.columns) == ['Date', 'Time', 'A']
+    assert labels['Date'].tolist() == ['2025-03-27', '2025-03-27', '2025-03-28']
+    assert labels['Time'].tolist() == ['00:00:00', '12:30:00', '24:00:00']
+    # float32 readings come back as the rounded values that went in
+    assert labels['A'].tolist()[1:] == [0.1, 1.234]
+
+def test_parse_slot():
+    assert parse_slot('07:30') == parse_slot('07:30:00') == 450
+    assert slot_label(parse_slot('24:00:00')) == '24:00:00'
+
+def test_day_index_slices():
+    df = to_compact(pd.DataFrame({
+        'Date': ['2025-03-27'] * 2 + ['2025-03-28'] * 3 + ['2025-03-30'],
+        'Time': ['12:00', '13:00', '12:00', '13:00', '14:00', '12:00'],
+        'A': np.arange(6, dtype=float)
+    }))
+    index = build_day_index(df)
+    day = parse_day('2025-03-28')
+
+    assert index['days'].tolist() == [day - 1, day, day + 2]
+    assert slice_days(df, index, day, day)['A'].tolist() == [2.0, 3.0, 4.0]
+    assert day_rows(index, day, day + 5) == (2, 6)
+    assert day_rows(index) == (0, 6)
+    # Days with no rows, or ranges the wrong way round, are empty
+    assert slice_days(df, index, day + 1, day + 1).empty
+    assert slice_days(df, index, day + 2, day).empty
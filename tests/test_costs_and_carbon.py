@@ -0,0 +1,38 @@
+import pandas as pd
+from datetime import date
+from app.compact_schema import DAY, parse_day, to_days
+from app import dataset_registry
+from app.costs_and_carbon import build_usage_index, get_usage_index, range_usage
+from app.dataset_registry import publish_dataset, make_handle, resolve_dataset
+
+GAS = 'TH-PM-01.TH-G-01 kWh (kWh) [DELTA] 1'
+
+def test_published_dataset_is_compact():
+    df = pd.DataFrame({'Date': [date(2025, 3, 27)], 'Time': ['12:00'], GAS: [1.0]})
+    handle = make_handle(publish_dataset(df))
+
+    # The costs callbacks read day numbers straight from the shared frame, with nothing to prepare per version
+    published = resolve_dataset(handle)
+    assert published is resolve_dataset(handle)
+    assert published[DAY].tolist() == [parse_day('2025-03-27')]
+    assert df['Date'].tolist() == [date(2025, 3, 27)]
+
+def test_range_usage():
+    daily_totals = pd.DataFrame(
+        {'A': [1.0, 2.0, None, 4.0]},
+        index=to_days([date(2025, 3, 27), date(2025, 3, 28), date(2025, 3, 29), date(2025, 3, 30)])
+    )
+    usage_index = build_usage_index(daily_totals)
+
+    assert range_usage(usage_index)['A'] == 7.0
+    assert range_usage(usage_index, '2025-03-28', '2025-03-30')['A'] == 6.0
+    assert range_usage(usage_index, '2025-03-28', '2025-03-28')['A'] == 2.0
+    # Ranges outside the data or the wrong way round are empty
+    assert range_usage(usage_index, '2025-04-01', '2025-04-30')['A'] == 0.0
+    assert range_usage(usage_index, '2025-03-30', '2025-03-27')['A'] == 0.0
+
+def test_usage_index_is_none_without_a_dataset(monkeypatch):
+    monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+    monkeypatch.setattr(dataset_registry, '_current_version', None)
+
+    assert get_usage_index({'version': 'missing'}) is None
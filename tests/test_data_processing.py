@@ -5,7 +5,10 @@ import pytest
 import sys
 import os
 from unittest.mock import patch
-from app.data_processing import apply_pulse_ratios, process_uploaded_file, load_initial_csv_data
+from app.compact_schema import DAY, day_labels, readings
+from app.data_processing import apply_pulse_ratios, process_uploaded_file, load_initial_csv_data, read_meter_workbook, \
+    merge_uploaded_data, save_uploaded_files
+from app.workbook_cache import get_cache_dir, verify_cache
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 #Tests for the apply_pulse_ratios function.
@@ -185,4 +188,125 @@ def test_load_initial_csv_data_empty_directory(tmpdir):
     result = load_initial_csv_data(path=str(tmpdir))
 
     # Assert the result is an empty DataFrame
-    assert result.empty
\ No newline at end of file
+    assert result.empty
+
+# Tests for the workbook cache used by load_initial_csv_data
+
+def test_load_initial_csv_data_uses_cache(tmpdir):
+    df1 = pd.DataFrame({'Date': ['2025-03-27', '2025-03-27'], 'Time': ['12:00', '13:00'], 'A': [1, 2]})
+    df2 = pd.DataFrame({'Date': ['2025-03-28', '2025-03-28'], 'Time': ['12:00', '13:00'], 'A': [3, 4]})
+    df1.to_excel(tmpdir.join("test1.xlsx"), index=False, engine='openpyxl')
+    df2.to_excel(tmpdir.join("test2.xlsx"), index=False, engine='openpyxl')
+
+    expected = load_initial_csv_data(path=str(tmpdir))
+    assert verify_cache(get_cache_dir(str(tmpdir)))[0]
+
+    # A warm cache should not parse any workbook again
+    with patch('app.data_processing.read_meter_workbook') as mock_read:
+        result = load_initial_csv_data(path=str(tmpdir))
+        mock_read.assert_not_called()
+    pd.testing.assert_frame_equal(result, expected)
+
+    # Only the changed workbook is parsed again
+    df2['A'] = [30, 40]
+    df2.to_excel(tmpdir.join("test2.xlsx"), index=False, engine='openpyxl')
+    with patch('app.data_processing.read_meter_workbook', wraps=read_meter_workbook) as mock_read:
+        result = load_initial_csv_data(path=str(tmpdir))
+        assert mock_read.call_count == 1
+    assert result['A'].tolist() == [1, 2, 30, 40]
+
+def test_load_initial_csv_data_rebuilds_corrupt_cache(tmpdir):
+    df = pd.DataFrame({'Date': ['2025-03-27', '2025-03-27'], 'Time': ['12:00', '13:00'], 'A': [1, 2]})
+    df.to_excel(tmpdir.join("test1.xlsx"), index=False, engine='openpyxl')
+    load_initial_csv_data(path=str(tmpdir))
+
+    # Truncate the cached data so the integrity check fails
+    cache_dir = get_cache_dir(str(tmpdir))
+    with open(os.path.join(cache_dir, 'workbooks.parquet'), 'wb') as f:
+        f.write(b'corrupt')
+    assert not verify_cache(cache_dir)[0]
+
+    result = load_initial_csv_data(path=str(tmpdir))
+    assert result['A'].tolist() == [1, 2]
+    assert verify_cache(cache_dir)[0]
+
+# Test that parallel ingest matches the serial result and reports per-file timings
+def test_load_initial_csv_data_parallel(tmpdir):
+    for day in range(1, 5):
+        df = pd.DataFrame({'Date': [f'2025-03-0{day}'] * 2, 'Time': ['12:00', '13:00'], 'A': [day, day * 10]})
+        df.to_excel(tmpdir.join(f"test{day}.xlsx"), index=False, engine='openpyxl')
+
+    timings = []
+    serial = load_initial_csv_data(path=str(tmpdir), use_cache=False, workers=1)
+    parallel = load_initial_csv_data(path=str(tmpdir), use_cache=False, workers=2, timings=timings)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert len(timings) == 4
+    assert all(timing['rows'] == 2 and timing['error'] is None for timing in timings)
+
+# Test for merge_uploaded_data splicing uploaded rows into an existing dataset
+def test_merge_uploaded_data():
+    from datetime import date
+    existing = pd.DataFrame({
+        'Date': [date(2025, 3, 27), date(2025, 3, 27), date(2025, 3, 29)],
+        'Time': ['12:00', '13:00', '12:00'],
+        'TH-E-01 kWh (kWh) [DELTA] 1': [1.0, 2.0, 3.0]
+    })
+    uploaded = pd.DataFrame({
+        'Date': pd.to_datetime(['2025-03-27', '2025-03-28']),
+        'Time': ['12:00', '12:00'],
+        'TH-E-01 kWh (kWh) [DELTA] 1': [9.0, 9.0],
+        'TH-PM-01.TH-G-01 kWh (kWh) [DELTA] 1': [10.0, 20.0]
+    })
+    pulse_ratios = {'TH-PM-01.TH-G-01 kWh (kWh) [DELTA] 1': 0.1}
+
+    result = merge_uploaded_data(existing, uploaded, pulse_ratios)
+
+    assert day_labels(result[DAY]).tolist() == ['2025-03-27', '2025-03-27', '2025-03-28', '2025-03-29']
+    # Uploaded readings win, new meters are filled in and only the uploaded rows are scaled
+    assert result['TH-E-01 kWh (kWh) [DELTA] 1'].tolist() == [9.0, 2.0, 9.0, 3.0]
+    gas = result['TH-PM-01.TH-G-01 kWh (kWh) [DELTA] 1']
+    assert gas.isna().tolist() == [False, True, False, True]
+    assert readings(gas.dropna()).tolist() == [1.0, 2.0]
+
+# A corrected re-upload of one meter replaces its readings and keeps the other meters of the day
+def test_merge_uploaded_data_corrected_reupload():
+    existing = pd.DataFrame({'Date': ['2025-03-27'] * 2, 'Time': ['12:00', '13:00'], 'A': [1.0, 2.0], 'B': [5.0, 6.0]})
+    corrected = pd.DataFrame({'Date': ['2025-03-27'] * 2, 'Time': ['12:00', '13:00'], 'A': [9.0, None]})
+
+    result = merge_uploaded_data(existing, corrected, {})
+
+    assert readings(result['A']).tolist() == [9.0, 2.0]
+    assert readings(result['B']).tolist() == [5.0, 6.0]
+
+# A re-upload with the same name and size but different bytes replaces the saved workbook
+def test_save_uploaded_files_replaces_changed_contents(tmpdir):
+    save_path = str(tmpdir.join('2025-03-27_Daily Report.xlsx'))
+    save_uploaded_files([(save_path, b'old readings')])
+    save_uploaded_files([(save_path, b'new readings')])
+
+    with open(save_path, 'rb') as f:
+        assert f.read() == b'new readings'
+
+# Test for process_uploaded_file parsing ZIP members in a single pass
+def test_process_uploaded_file_zip_single_pass(tmpdir):
+    zip_path = tmpdir.join("test.zip")
+    with zipfile.ZipFile(zip_path, 'w') as z:
+        for day in ('2025-03-27', '2025-03-28'):
+            excel_path = tmpdir.join(f"{day}_Daily Report.xlsx")
+            pd.DataFrame({'Time': ['12:00', '13:00'], 'A': [1, 2]}).to_excel(excel_path, index=False, engine='openpyxl')
+            z.write(excel_path, arcname=f"reports/{day}_Daily Report.xlsx")
+
+    with open(zip_path, 'rb') as f:
+        encoded_zip = base64.b64encode(f.read()).decode('utf-8')
+
+    upload_folder = tmpdir.mkdir("uploads")
+    with patch('app.data_processing.UPLOAD_FOLDER', str(upload_folder)):
+        contents = f"data:application/zip;base64,{encoded_zip}"
+        with patch('app.data_processing.pd.concat', wraps=pd.concat) as mock_concat:
+            result = process_uploaded_file(contents, "uploaded_test.zip", None, background_save=False)
+            assert mock_concat.call_count == 1
+
+    assert len(result) == 4
+    assert result['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2025-03-27'] * 2 + ['2025-03-28'] * 2
+    assert os.path.exists(upload_folder.join('2025-03-27', '2025-03-27_Daily Report.xlsx'))
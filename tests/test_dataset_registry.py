@@ -0,0 +1,38 @@
+from app import dataset_registry
+from app.compact_schema import DAY, day_labels, parse_day, slice_days
+
+# A frame resolved before a publish is sliced with its own day index, not the new version's
+def test_day_index_follows_the_frame_across_publishes(monkeypatch, make_frame):
+    monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+    handle = dataset_registry.make_handle(dataset_registry.publish_dataset(make_frame(['2025-03-27', '2025-03-28'])))
+    df = dataset_registry.resolve_dataset(handle)
+
+    dataset_registry.publish_dataset(make_frame(['2025-03-20', '2025-03-21', '2025-03-28']))
+    day = parse_day('2025-03-28')
+    sliced = slice_days(df, dataset_registry.get_day_index(df), day, day)
+
+    assert day_labels(sliced[DAY]).tolist() == ['2025-03-28'] * 2
+    assert dataset_registry.get_day_index(df) is dataset_registry.get_day_index(df)
+
+# A handle this worker can't serve is reported as expired instead of resolving to another dataset
+def test_unknown_version_is_expired(monkeypatch, make_frame):
+    monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+    current = dataset_registry.publish_dataset(make_frame(['2025-03-27']))
+
+    assert dataset_registry.resolve_dataset({'version': 'published-elsewhere'}) is None
+    assert dataset_registry.is_expired({'version': 'published-elsewhere'})
+    # A handle without a version still means the current dataset
+    assert dataset_registry.resolve_version({'version': None}) == current
+    assert not dataset_registry.is_expired(dataset_registry.make_handle(current))
+
+# Versions that are still being read are kept; the least recently used one is evicted
+def test_least_recently_used_version_is_evicted(monkeypatch, make_frame):
+    monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+    days = ['2025-03-01', '2025-03-02', '2025-03-03', '2025-03-04', '2025-03-05']
+    versions = [dataset_registry.publish_dataset(make_frame([day])) for day in days[:dataset_registry.MAX_VERSIONS]]
+    dataset_registry.get_dataset(versions[0])
+
+    dataset_registry.publish_dataset(make_frame([days[dataset_registry.MAX_VERSIONS]]))
+
+    assert dataset_registry.get_dataset(versions[0]) is not None
+    assert dataset_registry.get_dataset(versions[1]) is None
@@ -0,0 +1,23 @@
+import numpy as np
+from app.downsampling import lttb, downsample_series
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[437] = 25.0  # A single spike must survive downsampling
+
+    indices = lttb(x, y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 437 in indices
+    assert np.all(np.diff(indices) > 0)
+
+def test_downsample_series_skips_missing_readings():
+    x = np.arange('2025-03-27T00:00', '2025-03-27T05:00', np.timedelta64(30, 'm'), dtype='datetime64[ns]')
+    y = np.array([1.0, np.nan, 3.0, 4.0, np.nan, 6.0, 7.0, 8.0, 9.0, 10.0])
+
+    xs, ys = downsample_series(x, y, 100)
+
+    assert len(xs) == 8
+    assert not np.isnan(ys).any()
@@ -0,0 +1,46 @@
+import io
+import pandas as pd
+import pytest
+from app.database import db
+from app.exports import export_url, register_export_routes
+from app.models import SavedCollection
+
+@pytest.fixture
+def client(server):
+    register_export_routes(server)
+    for energy_type, meter in [('Electricity kWh', 'E-01'), ('Gas m³', 'G-01')]:
+        db.session.add(SavedCollection(
+            group_name='Site A/B', energy_type=energy_type, date='2025-03-20', input='note',
+            datetime='2025-04-01 10:00:00', values=[{'Time': '00:30:00', meter: 1.5}, {'Time': '01:00:00', meter: None}]
+        ))
+    db.session.commit()
+    client = server.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+def test_export_csv_and_parquet(client):
+    response = client.get(export_url('Site A/B', 'csv'))
+    assert response.status_code == 200
+    assert response.is_streamed
+    df = pd.read_csv(io.BytesIO(response.data))
+    assert df.columns.tolist() == ['Energy Type', 'Date', 'Time', 'Usage', 'Label', 'Saved At']
+    assert len(df) == 4
+    assert df['Usage'].isna().tolist() == [False, True, False, True]
+
+    df_parquet = pd.read_parquet(io.BytesIO(client.get(export_url('Site A/B', 'parquet')).data))
+    pd.testing.assert_series_equal(df_parquet['Usage'], df['Usage'])
+    assert df_parquet['Energy Type'].tolist() == df['Energy Type'].tolist()
+
+# Excel exports keep one sheet per energy type, as the in-memory export did
+def test_export_xlsx(client):
+    response = client.get(export_url('Site A/B'))
+    sheets = pd.read_excel(io.BytesIO(response.data), sheet_name=None)
+    assert list(sheets) == ['Electricity kWh', 'Gas m³']
+    assert sheets['Gas m³'].columns.tolist() == ['Time', 'G-01', 'Date', 'Label', 'Saved At']
+
+def test_export_requires_login_and_known_format(client):
+    assert client.get(export_url('Site A/B', 'pdf')).status_code == 400
+    with client.session_transaction() as session:
+        session.clear()
+    assert client.get(export_url('Site A/B')).status_code == 403
@@ -0,0 +1,24 @@
+import numpy as np
+from datetime import date
+from app.compact_schema import to_days
+from app.heatmap_cache import build_heatmap_matrices, update_heatmap_matrices, select_heatmap
+
+def test_update_heatmap_matrices_appends_new_days(make_frame):
+    old = make_frame([date(2025, 3, 27), date(2025, 3, 28)])
+    new = make_frame([date(2025, 3, 27), date(2025, 3, 28), date(2025, 3, 29)])
+
+    updated = update_heatmap_matrices(build_heatmap_matrices(old), old, new, set(to_days([date(2025, 3, 29)])))
+    rebuilt = build_heatmap_matrices(new)
+
+    assert list(updated['days']) == list(rebuilt['days'])
+    np.testing.assert_array_equal(updated['matrices']['A'], rebuilt['matrices']['A'])
+
+def test_select_heatmap(make_frame):
+    heatmap = build_heatmap_matrices(make_frame())
+
+    z, x, y = select_heatmap(heatmap, 'A', '2025-03-28')
+    assert x == ['2025-03-28']
+    assert z[:, 0].tolist() == [2.0, 3.0]
+
+    z, x, y = select_heatmap(heatmap, 'A', 'average')
+    assert z[:, 0].tolist() == [1.0, 2.0]
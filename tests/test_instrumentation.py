@@ -0,0 +1,64 @@
+import pytest
+from dash.exceptions import PreventUpdate
+from flask import Flask
+from app.instrumentation import Histogram, instrumented, record_rows, register_metrics_routes
+
+def test_histogram_render():
+    histogram = Histogram('test_seconds', "Test.", (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe('cb', value)
+
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{callback="cb",le="0.1"} 1',
+        'test_seconds_bucket{callback="cb",le="1.0"} 2',
+        'test_seconds_bucket{callback="cb",le="+Inf"} 3',
+        'test_seconds_count{callback="cb"} 3',
+        'test_seconds_sum{callback="cb"} 5.55'
+    ]
+
+# Sampled calls are timed and sized, exceptions are always counted and PreventUpdate is not an error
+def test_metrics_route():
+    server = Flask(__name__)
+    server.testing = True  # Let the callback exceptions reach the test
+    register_metrics_routes(server)
+
+    def sampled_callback(rows):
+        record_rows([0] * rows)
+        return 'ok'
+
+    def unsampled_callback():
+        return 'ok'
+
+    def failing_callback():
+        raise ValueError("bad")
+
+    def preventing_callback():
+        raise PreventUpdate
+
+    callbacks = {
+        'sampled': instrumented(sampled_callback, sample_rate=1),
+        'unsampled': instrumented(unsampled_callback, sample_rate=0),
+        'failing': instrumented(failing_callback, sample_rate=0),
+        'preventing': instrumented(preventing_callback, sample_rate=1)
+    }
+
+    @server.route('/call/<name>', methods=['POST'])
+    def call(name):
+        return callbacks[name](5) if name == 'sampled' else callbacks[name]()
+
+    client = server.test_client()
+    client.post('/call/sampled', data='x' * 10)
+    client.post('/call/unsampled')
+    with pytest.raises(ValueError):
+        client.post('/call/failing')
+    with pytest.raises(PreventUpdate):
+        client.post('/call/preventing')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'dash_callback_duration_seconds_count{callback="sampled_callback"} 1' in body
+    assert 'dash_callback_request_bytes_sum{callback="sampled_callback"} 10' in body
+    assert 'dash_callback_response_bytes_sum{callback="sampled_callback"} 2' in body
+    assert 'dash_callback_dataframe_rows_sum{callback="sampled_callback"} 5' in body
+    assert 'unsampled_callback' not in body
+    assert 'dash_callback_exceptions_total{callback="failing_callback",exception="ValueError"} 1' in body
+    assert 'preventing_callback",exception' not in body
@@ -0,0 +1,26 @@
+from benchmarks.load_test import callback_payload, percentile, sample_dates, summarise, with_handle
+
+# Payloads have the shape Dash posts for single and multi-output callbacks
+def test_callback_payload():
+    single = callback_payload([('statistics-output', 'children')], [('data-store', 'data', {'version': 'a'})])
+    assert single['output'] == 'statistics-output.children'
+    assert single['outputs'] == {'id': 'statistics-output', 'property': 'children'}
+    assert single['changedPropIds'] == ['data-store.data']
+
+    multi = callback_payload([('theme-wrapper', 'children'), ('url', 'pathname')],
+                             [('login-button', 'n_clicks', 1)], [('username', 'value', 'u')])
+    assert multi['output'] == '..theme-wrapper.children...url.pathname..'
+    assert multi['state'] == [{'id': 'username', 'property': 'value', 'value': 'u'}]
+
+    assert with_handle(single, {'version': 'b'})['inputs'][0]['value'] == {'version': 'b'}
+
+def test_percentiles_and_summary():
+    assert percentile([5, 1, 4, 2, 3], 50) == 3
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert sample_dates(['d1', 'd2', 'd3', 'd4', 'd5'], 3) == ['d1', 'd3', 'd5']
+
+    samples = [{'callback': 'c', 'label': 'x', 'seconds': 0.1, 'bytes': 2048, 'error': None},
+               {'callback': 'c', 'label': 'y', 'seconds': 0.3, 'bytes': 0, 'error': 'HTTP 500'}]
+    row = summarise(samples, wall_seconds=1.0)['c']
+    assert (row['requests'], row['errors'], row['mean_kb']) == (2, 1, 1.0)
+    assert row['error_examples'] == ['y: HTTP 500']
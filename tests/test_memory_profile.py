@@ -0,0 +1,32 @@
+import tracemalloc
+import numpy as np
+import pandas as pd
+from app import memory_profile
+from app.memory_profile import deep_size, profiled
+
+def test_deep_size():
+    df = pd.DataFrame({'Time': ['00:30:00'] * 100, 'A': np.zeros(100)})
+    assert deep_size(df) == df.memory_usage(deep=True).sum()
+
+    # Shared objects are counted once
+    array = np.zeros(1000)
+    assert 8000 < deep_size({'a': array, 'b': array}) < 9000
+
+# Each call is measured between two snapshots and the heaviest call's allocation sites are kept
+def test_profiled_records_callback_allocations():
+    def allocating_callback(size):
+        return [bytearray(size) for _ in range(10)]
+
+    wrapped = profiled(allocating_callback)
+    tracemalloc.start()
+    try:
+        wrapped(1000)
+        wrapped(100000)
+    finally:
+        tracemalloc.stop()
+
+    profile = memory_profile._callback_profiles.pop('allocating_callback')
+    assert profile['calls'] == 2
+    assert profile['max_peak_bytes'] >= 10 * 100000
+    assert 'test_memory_profile.py' in profile['top_sites'][0]['site']
+    assert profile['top_sites'][0]['size_diff_bytes'] >= 10 * 100000
@@ -0,0 +1,27 @@
+import pandas as pd
+from datetime import date
+from app.compact_schema import parse_slot, to_days
+from app.rollups import build_rollups, update_rollups, time_of_day_means
+
+def test_build_rollups(make_frame):
+    df = make_frame(A=[1.0, 3.0, 5.0, 2.0], B=[2.0, 6.0, 10.0, 4.0])
+    rollups = build_rollups(df)
+
+    assert rollups['daily_totals']['A'].tolist() == [4.0, 7.0]
+    assert rollups['daily_max']['B'].tolist() == [6.0, 10.0]
+    assert rollups['daily_max_time']['A'].tolist() == [parse_slot('13:00'), parse_slot('12:00')]
+    assert time_of_day_means(rollups)['A'].tolist() == [3.0, 2.5]
+
+# Updating the rollups for the changed days must match rebuilding them from scratch
+def test_update_rollups_matches_rebuild(make_frame):
+    old = make_frame(A=[1.0, 3.0, 5.0, 2.0], B=[2.0, 6.0, 10.0, 4.0])
+    new = make_frame(
+        [date(2025, 3, 27), date(2025, 3, 28), date(2025, 3, 29)],
+        A=[1.0, 3.0, 7.0, 8.0, 4.0, 4.0], B=[2.0, 6.0, 14.0, 16.0, 8.0, 8.0]
+    )
+
+    updated = update_rollups(build_rollups(old), old, new, set(to_days([date(2025, 3, 28), date(2025, 3, 29)])))
+    rebuilt = build_rollups(new)
+
+    for name in ('daily_totals', 'daily_max', 'daily_max_time', 'time_sums', 'time_counts'):
+        pd.testing.assert_frame_equal(updated[name], rebuilt[name], check_dtype=False)
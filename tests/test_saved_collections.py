@@ -0,0 +1,73 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from app.database import db, init_db
+from app.models import SavedCollection
+from app.saved_collections import (
+    get_saved_group_counts, get_saved_page, get_saved_summary, iter_saved_values, save_entries
+)
+
+@pytest.fixture
+def saved(server):
+    for i in range(5):
+        db.session.add(SavedCollection(
+            group_name=f"G{i % 2}", energy_type='Electricity kWh', date=f"2025-03-2{i}", input='',
+            datetime=f"2025-04-01 10:00:0{i}", values=[{'Time': '00:30:00', 'Usage': 1.0}] * (i + 1)
+        ))
+    db.session.commit()
+
+# Pages carry metadata and a record count, never the values themselves
+def test_get_saved_page(saved):
+    entries, page_count = get_saved_page(1, page_size=2)
+
+    assert page_count == 3
+    # Ordered by group so each group's entries are consecutive
+    assert [(entry['group_name'], entry['date']) for entry in entries] == [('G0', '2025-03-24'), ('G1', '2025-03-21')]
+    assert [entry['record_count'] for entry in entries] == [5, 2]
+    assert all('values' not in entry for entry in entries)
+
+def test_group_counts_summary_and_values(saved):
+    assert get_saved_group_counts() == {'G0': 3, 'G1': 2}
+    assert get_saved_summary() == (5, {'Electricity kWh': 5}, '2025-04-01 10:00:04')
+
+    values = list(iter_saved_values('G1', batch_size=1))
+    assert [len(entry['values']) for entry in values] == [2, 4]
+
+# Entries that are already saved are skipped by the unique index, the rest go in together
+def test_save_entries_skips_existing(saved):
+    entries = [{
+        'group_name': 'G1', 'energy_type': energy_type, 'date': '2025-03-21', 'input': 'N/A',
+        'datetime': '2025-04-02 09:00:00', 'values': [{'Time': '00:30:00', 'Usage': None}]
+    } for energy_type in ('Electricity kWh', 'Gas m³')]
+
+    assert save_entries(entries) == 1
+    assert save_entries(entries) == 0
+    assert get_saved_group_counts() == {'G0': 3, 'G1': 3}
+    assert list(iter_saved_values('G1'))[-1]['values'] == [{'Time': '00:30:00', 'Usage': None}]
+
+# Duplicates saved before the unique index existed are removed so the index can be created
+def test_init_db_drops_duplicates_before_creating_index(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'app.db'}"
+    old_server = Flask(__name__)
+    old_server.config['SQLALCHEMY_DATABASE_URI'] = uri
+    init_db(old_server)
+    with old_server.app_context():
+        db.session.execute(text("DROP INDEX ix_saved_collection_group_energy_type_date"))
+        for i in range(3):
+            db.session.add(SavedCollection(
+                group_name='G0', energy_type='Electricity kWh', date='2025-03-20', input='',
+                datetime=f"2025-04-01 10:00:0{i}", values=[]
+            ))
+        db.session.commit()
+        db.engine.dispose()
+
+    server = Flask(__name__)
+    server.config['SQLALCHEMY_DATABASE_URI'] = uri
+    init_db(server)
+    with server.app_context():
+        assert [row.datetime for row in SavedCollection.query.all()] == ['2025-04-01 10:00:00']
+        assert save_entries([{
+            'group_name': 'G0', 'energy_type': 'Electricity kWh', 'date': '2025-03-20', 'input': '',
+            'datetime': '2025-04-02 09:00:00', 'values': []
+        }]) == 0
+        db.engine.dispose()
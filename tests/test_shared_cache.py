@@ -0,0 +1,95 @@
+import pandas as pd
+from app import dataset_registry
+from app.compact_schema import to_compact
+from app.rollups import build_rollups
+from app.shared_cache import InProcessCache, SharedCache, set_shared_cache
+
+# Two days of two readings, the last one missing
+READINGS = [1.0, 3.0, 5.0, None]
+
+def test_frame_and_json_roundtrip(make_frame):
+    cache = SharedCache(InProcessCache(), namespace='test')
+    df = make_frame(A=READINGS)
+    cache.set_frame('dataset:x', df)
+    pd.testing.assert_frame_equal(cache.get_frame('dataset:x'), df)
+
+    rollups = build_rollups(df)
+    cache.set_frame('rollups:x', rollups['daily_totals'])
+    pd.testing.assert_frame_equal(cache.get_frame('rollups:x'), rollups['daily_totals'])
+
+    calls = []
+    build = lambda: calls.append(1) or {'data': [1, 2]}
+    assert cache.get_or_build_json('figure:x', build) == {'data': [1, 2]}
+    assert cache.get_or_build_json('figure:x', build) == {'data': [1, 2]}
+    assert len(calls) == 1
+
+def test_expired_entries_are_missing():
+    cache = SharedCache(InProcessCache(), namespace='test')
+    cache.set_json('figure:x', {'a': 1}, ttl=-1)
+    assert cache.get_json('figure:x') is None
+    assert not cache.exists('figure:x')
+
+def test_in_process_cache_evicts_least_recently_used():
+    client = InProcessCache(max_bytes=10)
+    client.setex('a', 60, b'1234')
+    client.setex('b', 60, b'1234')
+    client.get('a')
+    client.setex('c', 60, b'1234')
+
+    assert client.get('b') is None
+    assert client.get('a') == b'1234' and client.get('c') == b'1234'
+    assert client.memory_usage() == (2, 8)
+
+def test_expired_entries_are_evicted_on_write():
+    client = InProcessCache()
+    client.setex('old', -1, b'1234')
+    client.setex('new', 60, b'12')
+    assert client.memory_usage() == (1, 2)
+
+# Without redis, published datasets are not copied into the in-process cache
+def test_local_cache_does_not_copy_datasets(monkeypatch, make_frame):
+    monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+    client = InProcessCache()
+    set_shared_cache(SharedCache(client, namespace='test'))
+    try:
+        dataset_registry.publish_dataset(make_frame(A=READINGS))
+        assert client.memory_usage() == (0, 0)
+    finally:
+        set_shared_cache(None)
+
+# A handle published by one worker resolves on another worker that never saw the upload
+def test_version_published_elsewhere_is_loaded_from_shared_cache(monkeypatch, make_frame):
+    # shared=True makes the in-process cache stand in for redis
+    set_shared_cache(SharedCache(InProcessCache(), namespace='test', shared=True))
+    try:
+        df = make_frame(A=READINGS)
+        version = dataset_registry.publish_dataset(df)
+
+        monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+        handle = dataset_registry.make_handle(version)
+        # Datasets are published in the compact layout
+        pd.testing.assert_frame_equal(dataset_registry.resolve_dataset(handle), to_compact(df))
+        pd.testing.assert_frame_equal(
+            dataset_registry.resolve_rollups(handle)['daily_totals'], build_rollups(df)['daily_totals']
+        )
+    finally:
+        set_shared_cache(None)
+
+# A worker follows the shared pointer to a version another worker published after an upload
+def test_current_version_follows_other_workers(monkeypatch, make_frame):
+    set_shared_cache(SharedCache(InProcessCache(), namespace='test', shared=True))
+    try:
+        monkeypatch.setattr(dataset_registry, '_datasets', type(dataset_registry._datasets)())
+        initial = dataset_registry.publish_dataset(make_frame(A=READINGS))
+        this_worker = type(dataset_registry._datasets)(dataset_registry._datasets)
+
+        # Another worker publishes an upload
+        latest = dataset_registry.publish_dataset(make_frame(A=[2.0, 4.0, 6.0, 8.0]))
+
+        # This worker still only holds the initial dataset
+        monkeypatch.setattr(dataset_registry, '_datasets', this_worker)
+        monkeypatch.setattr(dataset_registry, '_current_version', initial)
+        assert dataset_registry.get_current_version() == latest
+        assert dataset_registry.get_dataset(latest)['A'].tolist() == [2.0, 4.0, 6.0, 8.0]
+    finally:
+        set_shared_cache(None)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from app.compact_schema import day_label, slot_labels, slot_label
+from app.statistics import build_usage_cube, compute_meter_statistics
+
+def test_compute_meter_statistics():
+    df = pd.DataFrame({
+        'Date': [date(2025, 3, 27)] * 3 + [date(2025, 3, 28)] * 3,
+        'Time': ['00:00', '00:30', '01:00'] * 2,
+        'A': [1.0, 5.0, 1.0, 2.0, 2.0, 2.0],
+        'B': [np.nan, 1.0, 1.0, 4.0, 9.0, np.nan]
+    })
+
+    statistics = compute_meter_statistics(build_usage_cube(df))
+
+    # The statistics hold day and slot numbers; labels are only made when rendering
+    assert day_label(statistics['A'].highest_day) == '2025-03-27'
+    assert statistics['A'].highest_usage == 7.0
+    assert slot_label(statistics['A'].max_time) == '00:30:00'
+    assert day_label(statistics['B'].highest_day) == '2025-03-28'
+    assert statistics['B'].max_value == 9.0
+    assert slot_labels(statistics['B'].day_times).tolist() == ['00:00:00', '00:30:00', '01:00:00']
+
+# Meters are found by name, wherever the Day and Slot columns are
+def test_build_usage_cube_ignores_column_order():
+    df = pd.DataFrame({'A': [1.0, 2.0], 'Day': [20174, 20174], 'Slot': [0, 30]})
+
+    statistics = compute_meter_statistics(build_usage_cube(df))
+
+    assert list(statistics) == ['A']
+    assert statistics['A'].highest_usage == 3.0
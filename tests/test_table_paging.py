@@ -0,0 +1,22 @@
+import pandas as pd
+from datetime import date
+from app.table_paging import get_page, split_filter_part
+
+def test_split_filter_part():
+    assert split_filter_part('{A} >= 5') == ('A', 'ge', 5.0)
+    assert split_filter_part('{Date} datestartswith 2025-03') == ('Date', 'datestartswith', '2025-03')
+
+def test_get_page_filters_sorts_and_slices():
+    df = pd.DataFrame({
+        'Date': [date(2025, 3, 27)] * 3 + [date(2025, 3, 28)] * 3,
+        'Time': ['00:00', '00:30', '01:00'] * 2,
+        'A': [1.0, 5.0, 3.0, 2.0, 6.0, 4.0]
+    })
+
+    records, page_count = get_page(df, 0, 2, [{'column_id': 'A', 'direction': 'desc'}], '{A} > 1')
+    assert [record['A'] for record in records] == [6.0, 5.0]
+    assert page_count == 3
+
+    records, page_count = get_page(df, 1, 2, [], '{Date} eq 2025-03-28')
+    assert [record['Time'] for record in records] == ['01:00']
+    assert page_count == 2
@@ -0,0 +1,85 @@
+import base64
+import io
+import time
+import zipfile
+from unittest.mock import patch
+import pandas as pd
+from app import dataset_registry
+from app.compact_schema import DAY, day_labels
+from app.shared_cache import InProcessCache, SharedCache, set_shared_cache
+from app.upload_jobs import (
+    UPLOAD_JOB_TTL, describe_upload_job, get_upload_job, make_job_handle, may_still_appear, submit_upload_job
+)
+
+def make_zip_contents(days=('2025-03-27', '2025-03-28')):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        for day in days:
+            excel = io.BytesIO()
+            pd.DataFrame({'Time': ['12:00', '13:00'], 'A': [1.0, 2.0]}).to_excel(excel, index=False, engine='openpyxl')
+            z.writestr(f"reports/{day}_Daily Report.xlsx", excel.getvalue())
+    return f"data:application/zip;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+def wait_for(job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_upload_job(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Upload job {job_id} did not finish")
+
+# The upload is parsed off the request thread and the result is published as a new dataset version
+def test_upload_job_reports_progress_and_publishes(tmpdir):
+    set_shared_cache(SharedCache(InProcessCache(), namespace='test'))
+    existing = dataset_registry.make_handle(
+        dataset_registry.publish_dataset(pd.DataFrame({'Date': ['2025-03-26'], 'Time': ['12:00'], 'A': [5.0]}))
+    )
+    try:
+        with patch('app.data_processing.UPLOAD_FOLDER', str(tmpdir)), patch('app.upload_jobs.store_frame'):
+            job_id = submit_upload_job(
+                [make_zip_contents(), 'data:text/plain;base64,bm90IGEgd29ya2Jvb2s='],
+                ['upload.zip', '2025-03-29_broken.xlsx'],
+                existing
+            )
+            job = wait_for(job_id)
+
+        assert job['status'] == 'done'
+        assert (job['files_done'], job['workbooks_parsed'], job['rows_merged']) == (2, 2, 4)
+        assert len(job['errors']) == 1 and job['errors'][0].startswith('2025-03-29_broken.xlsx')
+        assert 'could not be processed' in describe_upload_job(job)
+
+        df = dataset_registry.get_dataset(job['version'])
+        assert day_labels(df[DAY].unique()).tolist() == ['2025-03-26', '2025-03-27', '2025-03-28']
+    finally:
+        set_shared_cache(None)
+
+# Two uploads queued from the same page both end up in the published dataset
+def test_queued_uploads_merge_onto_each_other(tmpdir):
+    set_shared_cache(SharedCache(InProcessCache(), namespace='test'))
+    handle = dataset_registry.make_handle(
+        dataset_registry.publish_dataset(pd.DataFrame({'Date': ['2025-03-26'], 'Time': ['12:00'], 'A': [5.0]}))
+    )
+    try:
+        with patch('app.data_processing.UPLOAD_FOLDER', str(tmpdir)), patch('app.upload_jobs.store_frame'):
+            first = submit_upload_job([make_zip_contents(('2025-03-27',))], ['first.zip'], handle)
+            second = submit_upload_job([make_zip_contents(('2025-03-28',))], ['second.zip'], handle)
+            first_job, second_job = wait_for(first), wait_for(second)
+
+        assert (first_job['status'], second_job['status']) == ('done', 'done')
+        assert dataset_registry.get_current_version() == second_job['version']
+        df = dataset_registry.get_dataset(second_job['version'])
+        assert day_labels(df[DAY].unique()).tolist() == ['2025-03-26', '2025-03-27', '2025-03-28']
+    finally:
+        set_shared_cache(None)
+
+# A job another worker is running can't be seen yet; it is polled for until it would have expired
+def test_missing_job_is_polled_until_it_expires():
+    handle = make_job_handle('not-on-this-worker')
+    assert may_still_appear(handle)
+    assert describe_upload_job(None, waiting=True) == "Waiting for the upload status..."
+
+    handle['submitted_at'] -= UPLOAD_JOB_TTL + 1
+    assert not may_still_appear(handle)
+    # Handles from before submitted_at was recorded are not waited for
+    assert not may_still_appear({'job_id': 'old'})
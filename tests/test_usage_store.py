@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+from datetime import date
+from app.compact_schema import to_days
+from app.models import UploadedData
+from app.usage_store import load_dataset, query_usage, store_frame
+
+# Meter B with the given readings and A with twice them, over two days of two slots
+@pytest.fixture
+def readings(make_frame):
+    def readings(values):
+        return make_frame(times=('12:00:00', '24:00:00'), B=values, A=[None if v is None else v * 2 for v in values])
+    return readings
+
+def test_store_frame_replaces_stored_readings(server, readings):
+    assert store_frame(readings([1.0, 2.0, 3.0, None])) == 6
+    # Readings that are stored again win, like merge_uploaded_data
+    store_frame(readings([9.0, 9.0, None, 4.0]))
+
+    assert UploadedData.query.count() == 8
+    df = query_usage()
+    assert list(df.columns) == ['Date', 'Time', 'B', 'A']
+    assert df['B'].tolist() == [9.0, 9.0, 3.0, 4.0]
+    assert df['A'].tolist() == [18.0, 18.0, 6.0, 8.0]
+
+def test_query_usage_filters_dates_and_meters(server, readings):
+    store_frame(readings([1.0, 2.0, 3.0, 4.0]))
+
+    df = query_usage(date(2025, 3, 28), date(2025, 3, 28), ['A'])
+    assert list(df.columns) == ['Date', 'Time', 'A']
+    assert df['Date'].tolist() == [date(2025, 3, 28)] * 2
+    assert df['A'].tolist() == [6.0, 8.0]
+
+def test_load_dataset_stores_workbook_readings(server, readings):
+    store_frame(readings([1.0, 2.0, 3.0, 4.0]), set(to_days([date(2025, 3, 27)])))
+
+    df = readings([9.0, 9.0, 3.0, 4.0])
+    loaded = load_dataset(df)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert query_usage()['B'].tolist() == [9.0, 9.0, 3.0, 4.0]
+
+# Only changed workbooks and days the table is missing are written; the workbook frame is served as it is
+def test_load_dataset_stores_changed_and_missing_days(server, readings):
+    store_frame(readings([1.0, 2.0, 3.0, 4.0]), set(to_days([date(2025, 3, 27)])))
+
+    df = readings([9.0, 9.0, 5.0, 6.0])
+    loaded = load_dataset(df, changed_dates=[])
+    pd.testing.assert_frame_equal(loaded, df)
+    assert query_usage()['B'].tolist() == [1.0, 2.0, 5.0, 6.0]
+
+    load_dataset(df, changed_dates=[date(2025, 3, 27)])
+    assert query_usage()['B'].tolist() == [9.0, 9.0, 5.0, 6.0]
+
+# Days that only the table has (e.g. uploaded ones) are added to the workbook frame
+def test_load_dataset_adds_stored_only_days(server, readings):
+    stored = readings([1.0, 2.0, 3.0, 4.0])
+    stored['C'] = [5.0, 6.0, 7.0, 8.0]
+    store_frame(stored)
+
+    df_files = readings([9.0, 9.0, 9.0, 9.0]).iloc[:2]
+    loaded = load_dataset(df_files, changed_dates=[])
+    assert list(loaded.columns) == ['Date', 'Time', 'B', 'A', 'C']
+    assert loaded['Date'].tolist() == [date(2025, 3, 27)] * 2 + [date(2025, 3, 28)] * 2
+    assert loaded['B'].tolist() == [9.0, 9.0, 3.0, 4.0]
+    assert loaded['C'].isna().tolist() == [True, True, False, False]
@@ -0,0 +1,20 @@
+import threading
+from app import warmup
+
+def test_background_warmup_reports_ready():
+    release = threading.Event()
+    thread = warmup.start_warmup(release.wait, mode='background')
+
+    assert not warmup.is_ready()
+    assert warmup.loading_message() == "Loading data, please wait..."
+    release.set()
+    thread.join(5)
+    assert warmup.is_ready() and warmup.get_warmup_error() is None
+
+def test_failed_warmup_is_reported():
+    def load():
+        raise OSError("CSV_files is missing")
+
+    warmup.start_warmup(load, mode='blocking')
+    assert warmup.is_ready()
+    assert warmup.loading_message() == "Data could not be loaded: CSV_files is missing"